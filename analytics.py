@@ -0,0 +1,345 @@
+"""Running aggregates over submissions, updated as each one is stored."""
+import heapq
+import math
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+
+RATINGS = ('A', 'B', 'C', 'D', 'F')
+
+SCORE_RANGES = (
+    ("excellent", 85),
+    ("good", 70),
+    ("fair", 55),
+    ("poor", 40),
+    ("failing", -math.inf)
+)
+
+RATING_SCORE_RANGES = {
+    "A": (85, math.inf),
+    "B": (70, 85),
+    "C": (55, 70),
+    "D": (40, 55),
+    "F": (-math.inf, 40)
+}
+
+
+def score_range(score):
+    """Name of the score band a score falls into."""
+    for name, lower in SCORE_RANGES:
+        if score >= lower:
+            return name
+
+
+class ScoreHistogram:
+    """
+    Fenwick tree of score counts at 0.01 resolution.
+
+    Scores are rounded to 2 decimals, so one bin per hundredth of a point
+    makes rank queries exact: insert and k-th smallest are both O(log bins)
+    and memory does not grow with the number of submissions. Scores outside
+    0-101 (only possible with unusual weights) land in the end bins.
+    """
+
+    RESOLUTION = 100
+    MAX_SCORE = 101
+
+    def __init__(self):
+        self.bins = self.MAX_SCORE * self.RESOLUTION + 1
+        self._tree = [0] * (self.bins + 1)
+        self._top_step = 1 << (self.bins.bit_length() - 1)
+        self.count = 0
+
+    def _bin(self, score):
+        return min(max(int(round(score * self.RESOLUTION)), 0), self.bins - 1)
+
+    def add(self, score, n=1):
+        i = self._bin(score) + 1
+        while i <= self.bins:
+            self._tree[i] += n
+            i += i & -i
+        self.count += n
+
+    def kth(self, k):
+        """Score of the k-th smallest entry (1-based)."""
+        position = 0
+        step = self._top_step
+        while step:
+            candidate = position + step
+            if candidate <= self.bins and self._tree[candidate] < k:
+                position = candidate
+                k -= self._tree[candidate]
+            step >>= 1
+        return position / self.RESOLUTION
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def quantile(self, q):
+        """
+        The q-quantile (0 <= q <= 1), interpolating linearly between ranks.
+
+        Matches statistics.median at q=0.5 and numpy's default method
+        elsewhere, for scores in range.
+        """
+        if not self.count:
+            return None
+        position = q * (self.count - 1)
+        lower = int(position)
+        low = self.kth(lower + 1)
+        if position == lower:
+            return low
+        high = self.kth(lower + 2)
+        return round(low + (high - low) * (position - lower), 4)
+
+
+class IssueCooccurrence:
+    """
+    How often each pair of issues is reported on the same submission.
+
+    A sparse, symmetric matrix kept as issue -> Counter of co-reported
+    issues, so the row for one issue is a dict lookup and only pairs that
+    actually occur take space. Updated per submission, in O(k^2) for its
+    k distinct issues.
+    """
+
+    def __init__(self):
+        self._related = {}
+
+    def add(self, issues, n=1):
+        distinct = sorted(set(issues))
+        for i, issue in enumerate(distinct):
+            for other in distinct[i + 1:]:
+                self._bump(issue, other, n)
+                self._bump(other, issue, n)
+
+    def remove(self, issues):
+        self.add(issues, -1)
+
+    def _bump(self, issue, other, n):
+        row = self._related.setdefault(issue, Counter())
+        row[other] += n
+        if row[other] <= 0:
+            del row[other]
+            if not row:
+                del self._related[issue]
+
+    def related(self, issue, limit=None):
+        """(other issue, count) pairs for one issue, most frequent first."""
+        return self._related.get(issue, Counter()).most_common(limit)
+
+    def pairs(self, limit=None):
+        """(issue, other, count) with issue < other, most frequent first."""
+        pairs = (
+            (issue, other, count)
+            for issue, row in self._related.items()
+            for other, count in row.items()
+            if issue < other
+        )
+        order = lambda pair: (-pair[2], pair[0], pair[1])
+        if limit is None:
+            return sorted(pairs, key=order)
+        return heapq.nsmallest(limit, pairs, key=order)
+
+
+class RunningSummary:
+    """
+    The /score-summary statistics, maintained one submission at a time.
+
+    remove() takes a submission back out (used when a product is rescored).
+    Once an extreme score has been removed, min and max come from the
+    histogram, which is exact for scores in 0-101.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self._min = None
+        self._max = None
+        self._extremes_exact = True
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.ratings = Counter()
+        self.issues = Counter()
+        self.ranges = Counter()
+        self.histogram = ScoreHistogram()
+        self.cooccurrence = IssueCooccurrence()
+
+    def add(self, score, rating, issues):
+        self.count += 1
+        self.total += score
+        self._min = score if self._min is None else min(self._min, score)
+        self._max = score if self._max is None else max(self._max, score)
+
+        delta = score - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (score - self._mean)
+
+        self.ratings[rating] += 1
+        self.issues.update(issues)
+        self.cooccurrence.add(issues)
+        self.ranges[score_range(score)] += 1
+        self.histogram.add(score)
+
+    def remove(self, score, rating, issues):
+        """Undo an earlier add() with the same values."""
+        if self.count <= 1:
+            self.__init__()
+            return
+
+        self.count -= 1
+        self.total -= score
+        delta = score - self._mean
+        self._mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (score - self._mean))
+        if score <= self._min or score >= self._max:
+            self._extremes_exact = False
+
+        for counter, key in ((self.ratings, rating), (self.ranges, score_range(score))):
+            counter[key] -= 1
+            if counter[key] <= 0:
+                del counter[key]
+        for issue in issues:
+            self.issues[issue] -= 1
+            if self.issues[issue] <= 0:
+                del self.issues[issue]
+        self.cooccurrence.remove(issues)
+        self.histogram.add(score, -1)
+
+    @property
+    def min(self):
+        if self._extremes_exact or not self.count:
+            return self._min
+        return self.histogram.kth(1)
+
+    @property
+    def max(self):
+        if self._extremes_exact or not self.count:
+            return self._max
+        return self.histogram.kth(self.count)
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def stdev(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0
+
+    def _lift(self, issue, other, count):
+        """How much more often two issues occur together than if they were independent."""
+        return round(count * self.count / (self.issues[issue] * self.issues[other]), 4)
+
+    def issue_pairs(self, limit=None):
+        """The most frequent pairs of issues reported together."""
+        return [
+            {"issues": [issue, other], "count": count, "lift": self._lift(issue, other, count)}
+            for issue, other, count in self.cooccurrence.pairs(limit)
+        ]
+
+    def related_issues(self, issue, limit=None):
+        """Issues reported together with `issue`, or None if it was never reported."""
+        if not self.issues[issue]:
+            return None
+        return [
+            {
+                "issue": other,
+                "count": count,
+                "confidence": round(count / self.issues[issue], 4),
+                "lift": self._lift(issue, other, count)
+            }
+            for other, count in self.cooccurrence.related(issue, limit)
+        ]
+
+    def quantiles(self, qs):
+        return {f"{q:g}": self.histogram.quantile(q) for q in qs}
+
+    def to_dict(self, quantiles=()):
+        if not self.count:
+            empty = {
+                "total_products": 0,
+                "average_score": 0,
+                "ratings": {},
+                "top_issues": []
+            }
+            if quantiles:
+                empty["quantiles"] = self.quantiles(quantiles)
+            return empty
+
+        summary = {
+            "total_products": self.count,
+            "average_score": round(self.mean, 2),
+            "ratings": {rating: self.ratings[rating] for rating in RATINGS},
+            "top_issues": [{"issue": issue, "count": count} for issue, count in self.issues.most_common(5)],
+            "distribution": {
+                "min_score": self.min,
+                "max_score": self.max,
+                "median_score": self.histogram.median(),
+                "std_dev": round(self.stdev, 2)
+            },
+            "score_range": {name: self.ranges[name] for name, _ in SCORE_RANGES}
+        }
+        if quantiles:
+            summary["quantiles"] = self.quantiles(quantiles)
+        return summary
+
+
+class TimeSeriesRollups:
+    """
+    Per-minute, per-hour and per-day aggregates of scores, kept as they arrive.
+
+    ISO timestamps sort lexically, so a bucket is just a timestamp prefix
+    ("2025-01-01T12" is an hour) and no dates are parsed. Each bucket holds
+    [count, total, min, max, ratings Counter].
+    """
+
+    PREFIX_LENGTHS = {"minute": 16, "hour": 13, "day": 10}
+    BUCKET_SUFFIXES = {"minute": ":00", "hour": ":00:00", "day": "T00:00:00"}
+
+    def __init__(self):
+        self._buckets = {granularity: {} for granularity in self.PREFIX_LENGTHS}
+        self._keys = {granularity: [] for granularity in self.PREFIX_LENGTHS}
+
+    def add(self, timestamp, score, rating):
+        for granularity, length in self.PREFIX_LENGTHS.items():
+            key = timestamp[:length]
+            buckets = self._buckets[granularity]
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [0, 0.0, score, score, Counter()]
+                keys = self._keys[granularity]
+                if not keys or key > keys[-1]:
+                    keys.append(key)
+                else:
+                    insort(keys, key)
+            bucket[0] += 1
+            bucket[1] += score
+            bucket[2] = min(bucket[2], score)
+            bucket[3] = max(bucket[3], score)
+            bucket[4][rating] += 1
+
+    def buckets(self, granularity):
+        """(key, bucket) pairs for one granularity, oldest first."""
+        buckets = self._buckets[granularity]
+        return [(key, buckets[key]) for key in self._keys[granularity]]
+
+    def series(self, granularity, since=None, until=None, limit=None):
+        """Buckets overlapping since..until (ISO timestamps), as response dicts; the newest `limit` if set."""
+        length = self.PREFIX_LENGTHS[granularity]
+        keys = self._keys[granularity]
+        start = bisect_left(keys, since[:length]) if since else 0
+        end = bisect_right(keys, until[:length]) if until else len(keys)
+        if limit is not None:
+            start = max(start, end - limit)
+        buckets = self._buckets[granularity]
+        return [bucket_dict(granularity, key, *buckets[key]) for key in keys[start:end]]
+
+
+def bucket_dict(granularity, key, count, total, min_score, max_score, ratings):
+    return {
+        "bucket": key + TimeSeriesRollups.BUCKET_SUFFIXES[granularity],
+        "count": count,
+        "average_score": round(total / count, 2),
+        "min_score": min_score,
+        "max_score": max_score,
+        "ratings": {rating: ratings.get(rating, 0) for rating in RATINGS}
+    }
@@ -1,24 +1,140 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, has_request_context, request, jsonify, stream_with_context
 from flask_cors import CORS
 import anthropic
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
-import statistics
+import math
+import threading
+import time
+import numpy as np
+from analytics import RATINGS, TimeSeriesRollups
+from batches import BulkSuggestionPipeline
+from cache import SingleFlight, make_suggestion_cache, suggestion_cache_key
+from fastjson import OrjsonProvider, dumps
+from issues import DEFAULT_RULES_PATH, IssueRuleEngine
+from llm import make_http_client, make_llm_gateway
+from metrics import Registry
+from schemas import (
+    InvalidRequest,
+    load_json,
+    parse_batch_request,
+    parse_score_request,
+    parse_sensitivity_request,
+    parse_weight_profile_request
+)
+from storage import SUMMARY_SCOPES, decode_cursor, encode_cursor, make_submission_store
+from weights import ProfileConflict, WeightRegistry, make_profile
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
-client = anthropic.Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
-submissions = []
+client = anthropic.Anthropic(
+    api_key=os.getenv("CLAUDE_API_KEY"),
+    base_url=os.getenv("CLAUDE_BASE_URL"),
+    max_retries=0,
+    http_client=make_http_client()
+)
+llm = make_llm_gateway(client)
+store = make_submission_store()
+suggestion_cache = make_suggestion_cache()
+suggestion_flights = SingleFlight()
+issue_rules = IssueRuleEngine(
+    os.getenv("ISSUE_RULES_FILE", DEFAULT_RULES_PATH),
+    float(os.getenv("ISSUE_RULES_RELOAD_INTERVAL", 2))
+)
+
+suggestion_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SUGGESTION_WORKERS", 8)),
+    thread_name_prefix="suggestions"
+)
+suggestion_jobs = OrderedDict()
+suggestion_jobs_lock = threading.Lock()
+MAX_SUGGESTION_JOBS = int(os.getenv("MAX_SUGGESTION_JOBS", 10000))
+
+SERVER_TIMING = os.getenv("SERVER_TIMING", "").lower() in ('1', 'true', 'yes')
+metrics = Registry()
+request_latency = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from request start until the response is handed to the server.",
+    ("method", "route", "status")
+)
+stage_latency = metrics.histogram(
+    "score_stage_duration_seconds",
+    "Time spent in each stage of scoring a product.",
+    ("stage",)
+)
+suggestion_requests = metrics.counter(
+    "suggestion_requests_total",
+    "Suggestion lookups by where the answer came from.",
+    ("source",)
+)
 
 DEFAULT_WEIGHTS = {
     "gwp": 0.40,    
     "circularity": 0.35,  
     "cost": 0.25      
 }
+weight_profiles = WeightRegistry(DEFAULT_WEIGHTS, store)
+REQUEST_ONLY_FIELDS = ('weights', 'weights_profile')
+
+MAX_SENSITIVITY_CELLS = int(os.getenv("MAX_SENSITIVITY_CELLS", 2000000))
+RANKING_DEFAULT_K = 20
+RANKING_MAX_K = 1000
+TIMESERIES_MAX_BUCKETS = 10000
+SUMMARY_MAX_QUANTILES = 100
+COOCCURRENCE_DEFAULT_LIMIT = 20
+COOCCURRENCE_MAX_LIMIT = 1000
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 1000
+STREAM_LINES_PER_CHUNK = 500
+
+SUGGESTION_MODEL = "claude-sonnet-4-5-20250929"
+SUGGESTION_MAX_TOKENS = 500
+FALLBACK_SUGGESTIONS = [
+    "Consider using more sustainable materials",
+    "Optimize transport method to reduce emissions",
+    "Improve packaging recyclability"
+]
+
+RATING_THRESHOLDS = np.array([40, 55, 70, 85])
+RATING_LABELS = np.array(['F', 'D', 'C', 'B', 'A'])
+
+@contextmanager
+def timed_stage(name):
+    """Time a block into the stage histogram and the request's Server-Timing list."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_latency.observe(elapsed, name)
+        if has_request_context() and 'stage_timings' in g:
+            g.stage_timings.append((name, elapsed))
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.stage_timings = []
+
+@app.after_request
+def record_request_latency(response):
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    request_latency.observe(elapsed, request.method, route, str(response.status_code))
+    
+    if SERVER_TIMING:
+        timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in g.get('stage_timings', [])]
+        timings.append(f"total;dur={elapsed * 1000:.2f}")
+        response.headers['Server-Timing'] = ', '.join(timings)
+    
+    return response
 
 def calculate_sustainability_score(gwp, circularity, cost, weights=None):
     """
@@ -28,30 +144,26 @@ def calculate_sustainability_score(gwp, circularity, cost, weights=None):
         gwp: Global Warming Potential in kg CO2e (lower is better, range 0-100)
         circularity: Circularity score 0-100 (higher is better)
         cost: Product cost in USD (lower is better, range 0-1000)
-        weights: Dict with keys 'gwp', 'circularity', 'cost' (must sum to 1.0)
+        weights: A WeightProfile (already validated), or a dict with keys
+            'gwp', 'circularity', 'cost' (each 0-1, summing to 1.0)
     
     Returns:
         Float score between 0-100
     """
-    if weights is None:
-        weights = DEFAULT_WEIGHTS
-    
-    weight_sum = weights['gwp'] + weights['circularity'] + weights['cost']
-    if abs(weight_sum - 1.0) > 0.01:
-        raise ValueError("Weights must sum to 1.0")
+    profile = weight_profiles.default if weights is None else make_profile(weights)
     
-    gwp_normalized = max(0, min(100, float(gwp)))
+    gwp_normalized = max(0, min(100, gwp))
     gwp_score = 100 - gwp_normalized
     
-    circularity_score = max(0, min(100, float(circularity)))
+    circularity_score = max(0, min(100, circularity))
     
-    cost_normalized = max(0, min(1000, float(cost)))
+    cost_normalized = max(0, min(1000, cost))
     cost_score = 100 - (cost_normalized / 1000 * 100)
     
     final_score = (
-        gwp_score * weights['gwp'] +
-        circularity_score * weights['circularity'] +
-        cost_score * weights['cost']
+        gwp_score * profile.gwp +
+        circularity_score * profile.circularity +
+        cost_score * profile.cost
     )
     
     return round(final_score, 2)
@@ -69,28 +181,84 @@ def get_rating(score):
     else:
         return "F"
 
-def extract_issues(materials, transport, packaging):
-    """Extract sustainability issues from product attributes."""
-    issues = []
+def score_components(gwp, circularity, cost):
+    """
+    Normalize GWP, circularity and cost for many products at once.
     
-    problem_materials = ['plastic', 'pvc', 'polystyrene', 'styrofoam']
-    for mat in materials:
-        if any(pm in mat.lower() for pm in problem_materials):
-            issues.append(f"{mat} material used")
+    Applies the same clipping as calculate_sustainability_score and returns
+    an (n, 3) array of GWP, circularity and cost sub-scores (0-100 each).
+    """
+    gwp_score = 100 - np.clip(np.asarray(gwp, dtype=float), 0, 100)
+    circularity_score = np.clip(np.asarray(circularity, dtype=float), 0, 100)
+    cost_score = 100 - (np.clip(np.asarray(cost, dtype=float), 0, 1000) / 1000 * 100)
+    return np.column_stack((gwp_score, circularity_score, cost_score))
+
+def calculate_sustainability_scores(gwp, circularity, cost, weights=None):
+    """
+    Vectorized calculate_sustainability_score over arrays of products.
     
-    if transport.lower() in ['air', 'air freight', 'airplane']:
-        issues.append("Air transport (high emissions)")
+    Args:
+        gwp, circularity, cost: Array-likes of equal length
+        weights: A WeightProfile, or a dict with keys 'gwp', 'circularity', 'cost' (each 0-1, summing to 1.0)
     
-    non_recyclable = ['plastic', 'mixed materials', 'non-recyclable']
-    if any(nr in packaging.lower() for nr in non_recyclable):
-        issues.append("Non-recyclable packaging")
+    Returns:
+        NumPy array of scores between 0-100, rounded to 2 decimals
+    """
+    profile = weight_profiles.default if weights is None else make_profile(weights)
     
-    return issues
+    components = score_components(gwp, circularity, cost)
+    weights = np.array([[profile.gwp, profile.circularity, profile.cost]])
+    return weighted_scores(components, weights)[:, 0]
 
-def get_ai_suggestions(product_data, score, rating):
-    """Get AI-powered suggestions from Claude."""
-    try:
-        prompt = f"""Analyze this product's sustainability and provide 3-5 specific, actionable suggestions to improve its environmental impact:
+def weighted_scores(components, weights):
+    """
+    Scores for every product (row of components) under every weighting (row of weights).
+    
+    Returns an (n, points) array. Terms are added in the same order as
+    calculate_sustainability_score and rounded with Python's round(), so
+    each score is identical to the one /score gives.
+    """
+    scores = (
+        components[:, 0:1] * weights[:, 0] +
+        components[:, 1:2] * weights[:, 1] +
+        components[:, 2:3] * weights[:, 2]
+    )
+    return round_scores(scores)
+
+def round_scores(scores):
+    """
+    Round an array of scores to 2 decimals exactly as round(score, 2) does.
+    
+    np.round scales and rounds half to even, which differs from Python's
+    correctly rounded round() for some values and can flip a rating.
+    """
+    rounded = np.fromiter((round(score, 2) for score in scores.ravel().tolist()), dtype=float, count=scores.size)
+    return rounded.reshape(scores.shape)
+
+def get_ratings(scores):
+    """Convert an array of scores to letter ratings."""
+    return RATING_LABELS[np.searchsorted(RATING_THRESHOLDS, scores, side='right')]
+
+def weight_grid(step):
+    """
+    Every (gwp, circularity, cost) weighting on the simplex at the given step.
+    
+    Returns a (points, 3) array whose rows sum to 1; step must divide 1 evenly.
+    """
+    divisions = int(round(1 / step))
+    if abs(divisions * step - 1) > 1e-9:
+        raise ValueError("step must divide 1 evenly (e.g. 0.05, 0.1, 0.25)")
+    
+    counts = [(a, b, divisions - a - b) for a in range(divisions + 1) for b in range(divisions + 1 - a)]
+    return np.array(counts, dtype=float) / divisions
+
+def extract_issues(materials, transport, packaging):
+    """Extract sustainability issues from product attributes."""
+    return [match.issue for match in issue_rules.match(materials, transport, packaging)]
+
+def build_suggestion_prompt(product_data, score, rating):
+    """Build the Claude prompt asking for improvement suggestions."""
+    return f"""Analyze this product's sustainability and provide 3-5 specific, actionable suggestions to improve its environmental impact:
 
 Product: {product_data['product_name']}
 Materials: {', '.join(product_data['materials'])}
@@ -107,156 +275,803 @@ Provide ONLY a bulleted list of 3-5 practical suggestions. Be concise and specif
 - Suggestion 2
 etc."""
 
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        suggestions_text = message.content[0].text.strip()
-        suggestions = [s.strip('- ').strip() for s in suggestions_text.split('\n') if s.strip().startswith('-')]
-        return suggestions[:5]  
-        
-    except Exception as e:
-        return [
-            "Consider using more sustainable materials",
-            "Optimize transport method to reduce emissions",
-            "Improve packaging recyclability"
-        ]
+def parse_suggestions(suggestions_text):
+    """Pull up to five bullet points out of Claude's reply."""
+    suggestions = [s.strip('- ').strip() for s in suggestions_text.strip().split('\n') if s.strip().startswith('-')]
+    return suggestions[:5]
 
-@app.route('/score', methods=['POST'])
-def calculate_score():
-    """Calculate sustainability score for a product."""
+def get_ai_suggestions(product_data, score, rating):
+    """Get AI-powered suggestions from Claude."""
     try:
-        data = request.get_json()
+        cache_key = suggestion_cache_key(product_data, score, rating)
+        if suggestion_cache is not None:
+            cached = suggestion_cache.get(cache_key)
+            if cached is not None:
+                suggestion_requests.inc("cache")
+                return cached
         
-        required = ['product_name', 'materials', 'transport', 'packaging', 'gwp', 'cost', 'circularity']
-        missing = [field for field in required if field not in data]
-        if missing:
-            return jsonify({
-                "success": False,
-                "error": f"Missing required fields: {', '.join(missing)}"
-            }), 400
+        def fetch():
+            prompt = build_suggestion_prompt(product_data, score, rating)
+            
+            with timed_stage("llm"):
+                message = llm.create(
+                    model=SUGGESTION_MODEL,
+                    max_tokens=SUGGESTION_MAX_TOKENS,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            
+            suggestions = parse_suggestions(message.content[0].text)
+            if suggestion_cache is not None and suggestions:
+                suggestion_cache.set(cache_key, suggestions)
+            return suggestions
         
-        weights = data.get('weights', DEFAULT_WEIGHTS)
+        suggestions, shared = suggestion_flights.do(cache_key, fetch)
+        suggestion_requests.inc("coalesced" if shared else "claude")
+        return list(suggestions)
+        
+    except Exception as e:
+        suggestion_requests.inc("fallback")
+        return list(FALLBACK_SUGGESTIONS)
+
+bulk_suggestions = BulkSuggestionPipeline(
+    client,
+    store,
+    build_suggestion_prompt,
+    parse_suggestions,
+    SUGGESTION_MODEL,
+    SUGGESTION_MAX_TOKENS,
+    cache=suggestion_cache,
+    cache_key=suggestion_cache_key,
+    poll_interval=float(os.getenv("BULK_POLL_INTERVAL", 30))
+)
+
+def submit_suggestion_job(product_data, score, rating, submission_id):
+    """Fetch suggestions on the worker pool; the job ID is the submission ID."""
+    job_id = str(submission_id)
+    future = suggestion_executor.submit(get_ai_suggestions, product_data, score, rating)
+    
+    def store_suggestions(done):
+        store.update_suggestions(submission_id, done.result())
+    
+    future.add_done_callback(store_suggestions)
+    
+    with suggestion_jobs_lock:
+        suggestion_jobs[job_id] = future
+        while len(suggestion_jobs) > MAX_SUGGESTION_JOBS:
+            suggestion_jobs.popitem(last=False)
+    
+    return job_id
+
+def suggestion_job_state(job_id):
+    """
+    Return (status, suggestions) for a suggestion job, or None if unknown.
+    
+    Jobs started by another worker are answered from the submission store.
+    """
+    with suggestion_jobs_lock:
+        future = suggestion_jobs.get(job_id)
+    
+    if future is not None and future.done():
+        return "done", future.result()
+    
+    record = store.get(int(job_id)) if job_id.isascii() and job_id.isdecimal() else None
+    if record is None:
+        return None if future is None else ("pending", [])
+    return record.get('suggestions_status', 'done'), record.get('suggestions', [])
+
+def wait_for_suggestions(job_id, timeout):
+    """Block until a suggestion job finishes or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    while True:
+        state = suggestion_job_state(job_id)
+        remaining = deadline - time.monotonic()
+        if state is None or state[0] != "pending" or remaining <= 0:
+            return state
         
+        with suggestion_jobs_lock:
+            future = suggestion_jobs.get(job_id)
+        if future is not None:
+            wait([future], timeout=remaining)
+        else:
+            time.sleep(min(remaining, 0.5))
+
+def score_product(data):
+    """
+    Score, rate and match issues for a validated product payload.
+    
+    Returns the response body and the submission record, both without
+    suggestions yet.
+    """
+    profile = weight_profiles.resolve(data.get('weights'), data.get('weights_profile'))
+    
+    with timed_stage("score"):
         score = calculate_sustainability_score(
             data['gwp'],
             data['circularity'],
             data['cost'],
-            weights
+            profile
         )
         
         rating = get_rating(score)
+    
+    with timed_stage("issues"):
+        issue_matches = issue_rules.match(data['materials'], data['transport'], data['packaging'])
+        issues = [match.issue for match in issue_matches]
+    
+    result = {
+        "product_name": data['product_name'],
+        "sustainability_score": score,
+        "rating": rating,
+        "suggestions": [],
+        "issues": issues,
+        "issue_rules": [
+            {"issue": match.issue, "rule": match.rule, "keyword": match.keyword}
+            for match in issue_matches
+        ],
+        "weights_profile": profile.id,
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    submission_record = {
+        **{field: value for field, value in data.items() if field not in REQUEST_ONLY_FIELDS},
+        "score": score,
+        "rating": rating,
+        "suggestions": [],
+        "issues": issues,
+        "suggestions_status": "pending",
+        "timestamp": result['timestamp'],
+        "weights_profile": profile.id
+    }
+    
+    return result, submission_record
+
+def iter_suggestion_lines(chunks):
+    """Yield each bullet from streamed text as soon as its line is complete."""
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip().startswith('-'):
+                yield line.strip('- ').strip()
+    if buffer.strip().startswith('-'):
+        yield buffer.strip('- ').strip()
+
+def stream_ai_suggestions(product_data, score, rating):
+    """Like get_ai_suggestions, but yields each suggestion as Claude streams it."""
+    cache_key = suggestion_cache_key(product_data, score, rating)
+    if suggestion_cache is not None:
+        cached = suggestion_cache.get(cache_key)
+        if cached is not None:
+            suggestion_requests.inc("cache")
+            yield from cached
+            return
+    
+    suggestions = []
+    try:
+        # The llm stage times only the API read, not writes to the SSE client.
+        chunks = llm.stream_text(
+            timer=lambda: timed_stage("llm"),
+            model=SUGGESTION_MODEL,
+            max_tokens=SUGGESTION_MAX_TOKENS,
+            messages=[{"role": "user", "content": build_suggestion_prompt(product_data, score, rating)}]
+        )
+        try:
+            for suggestion in iter_suggestion_lines(chunks):
+                suggestions.append(suggestion)
+                yield suggestion
+                if len(suggestions) == 5:
+                    break
+        finally:
+            chunks.close()
+    except Exception as e:
+        if suggestions:
+            return
+        suggestion_requests.inc("fallback")
+        yield from FALLBACK_SUGGESTIONS
+        return
+    
+    if suggestion_cache is not None and suggestions:
+        suggestion_cache.set(cache_key, suggestions)
+    suggestion_requests.inc("claude")
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {dumps(payload).decode('utf-8')}\n\n"
+
+def score_event_stream(data):
+    """
+    Server-Sent Events response for a product.
+    
+    Sends a `score` event with score, rating and issues right away, one
+    `suggestion` event per bullet as Claude streams it, then `done`.
+    """
+    result, submission_record = score_product(data)
+    del result['suggestions']
+    store.add(submission_record)
+    result["id"] = submission_record['id']
+    result["product_key"] = submission_record['product_key']
+    result["version"] = submission_record['version']
+    
+    def events():
+        suggestions = []
+        completed = False
+        try:
+            yield sse_event("score", result)
+            for suggestion in stream_ai_suggestions(data, submission_record['score'], submission_record['rating']):
+                yield sse_event("suggestion", {"index": len(suggestions), "suggestion": suggestion})
+                suggestions.append(suggestion)
+            completed = True
+        finally:
+            if completed:
+                store.update_suggestions(submission_record['id'], suggestions)
+            else:
+                store.set_suggestions_status([submission_record['id']], "none")
+        yield sse_event("done", {"id": submission_record['id'], "suggestions": suggestions})
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route('/score', methods=['POST'])
+def calculate_score():
+    """Calculate sustainability score for a product."""
+    try:
+        with timed_stage("parse"):
+            body = load_json(request.get_data())
         
-        suggestions = get_ai_suggestions(data, score, rating)
+        with timed_stage("validate"):
+            data = parse_score_request(body)
         
-        issues = extract_issues(data['materials'], data['transport'], data['packaging'])
+        if 'text/event-stream' in request.headers.get('Accept', ''):
+            return score_event_stream(data)
         
-        result = {
-            "product_name": data['product_name'],
-            "sustainability_score": score,
-            "rating": rating,
-            "suggestions": suggestions,
-            "issues": issues,
-            "timestamp": datetime.now().isoformat()
-        }
+        result, submission_record = score_product(data)
+        score, rating = submission_record['score'], submission_record['rating']
         
-        submission_record = {
-            **data,
-            "score": score,
-            "rating": rating,
-            "suggestions": suggestions,
-            "issues": issues,
-            "timestamp": result['timestamp'],
-            "weights_used": weights
-        }
-        submissions.append(submission_record)
+        run_async = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+        if not run_async:
+            with timed_stage("suggestions"):
+                suggestions = get_ai_suggestions(data, score, rating)
+            result["suggestions"] = submission_record["suggestions"] = suggestions
+            submission_record["suggestions_status"] = "done"
         
-        return jsonify(result), 200
+        # Stamp on store, not on receipt, so a slow Claude reply cannot land
+        # behind newer submissions that /history?since= pollers have seen.
+        result["timestamp"] = submission_record["timestamp"] = datetime.now().isoformat()
+        with timed_stage("store"):
+            store.add(submission_record)
+        result["id"] = submission_record['id']
+        result["product_key"] = submission_record['product_key']
+        result["version"] = submission_record['version']
         
+        status = 200
+        if run_async:
+            job_id = submit_suggestion_job(data, score, rating, submission_record['id'])
+            result["suggestion_job_id"] = job_id
+            result["suggestions_status"] = "pending"
+            status = 202
+        
+        with timed_stage("serialize"):
+            response = jsonify(result)
+        return response, status
+        
+    except InvalidRequest as e:
+        return jsonify({"success": False, "error": str(e), "details": e.details}), 400
     except ValueError as e:
         return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
         return jsonify({"success": False, "error": f"Internal error: {str(e)}"}), 500
 
-@app.route('/history', methods=['GET'])
-def get_history():
-    """Get all recent submissions."""
+@app.route('/score/stream', methods=['POST'])
+def stream_score():
+    """Calculate a score and stream suggestions as Server-Sent Events."""
     try:
-        history = sorted(submissions, key=lambda x: x['timestamp'], reverse=True)
-        return jsonify({
-            "success": True,
-            "count": len(history),
-            "submissions": history
-        }), 200
+        data = parse_score_request(request.get_data())
+        return score_event_stream(data)
+        
+    except InvalidRequest as e:
+        return jsonify({"success": False, "error": str(e), "details": e.details}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
     except Exception as e:
+        return jsonify({"success": False, "error": f"Internal error: {str(e)}"}), 500
+
+@app.route('/suggestions/<job_id>', methods=['GET'])
+def get_suggestions(job_id):
+    """Poll or stream the result of a background suggestion job."""
+    if suggestion_job_state(job_id) is None:
+        return jsonify({"success": False, "error": "Unknown suggestion job"}), 404
+    
+    if 'text/event-stream' in request.headers.get('Accept', ''):
+        def events():
+            while True:
+                state = wait_for_suggestions(job_id, 15)
+                if state is None or state[0] != "pending":
+                    break
+                yield ": keep-alive\n\n"
+            status, suggestions = state or ("done", [])
+            yield sse_event("suggestions", {"status": status, "suggestions": suggestions})
         
+        return Response(events(), mimetype='text/event-stream', headers={"Cache-Control": "no-cache"})
+    
+    try:
+        timeout = min(max(float(request.args.get('wait', 0)), 0), 30)
+    except ValueError:
+        return jsonify({"success": False, "error": "wait must be a number of seconds"}), 400
+    
+    status, suggestions = wait_for_suggestions(job_id, timeout) or ("done", [])
+    
+    return jsonify({
+        "success": True,
+        "status": status,
+        "suggestions": suggestions
+    }), 200
+
+@app.route('/suggestions/bulk', methods=['POST'])
+def start_bulk_suggestions():
+    """Fetch suggestions for stored submissions through one Message Batch."""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if not isinstance(ids, list) or not ids or not all(type(i) is int for i in ids):
+        return jsonify({"success": False, "error": "ids must be a non-empty list of submission IDs"}), 400
+    
+    job = bulk_suggestions.start(ids)
+    return jsonify({"success": True, **job.to_dict()}), 202
+
+@app.route('/suggestions/bulk/<job_id>', methods=['GET'])
+def get_bulk_suggestions(job_id):
+    """Get the progress of a bulk suggestion job."""
+    job = bulk_suggestions.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Unknown bulk suggestion job"}), 404
+    return jsonify({"success": True, **job.to_dict()}), 200
+
+@app.route('/suggestion-cache', methods=['GET'])
+def get_suggestion_cache_stats():
+    """Get hit/miss counters for the suggestion cache."""
+    if suggestion_cache is None:
+        return jsonify({"success": True, "enabled": False}), 200
+    return jsonify({
+        "success": True,
+        "enabled": True,
+        **suggestion_cache.stats()
+    }), 200
+
+@app.route('/issues/rules', methods=['GET'])
+def get_issue_rules():
+    """List the active issue rules."""
+    return jsonify({
+        "success": True,
+        "path": issue_rules.path,
+        "rules": issue_rules.rules,
+        "last_error": issue_rules.last_error
+    }), 200
+
+@app.route('/issues/rules/reload', methods=['POST'])
+def reload_issue_rules():
+    """Reload the issue rules file immediately."""
+    try:
+        compiled = issue_rules.reload()
+        return jsonify({"success": True, "count": len(compiled.rules)}), 200
+    except (OSError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@app.route('/issues/cooccurrence', methods=['GET'])
+def get_issue_cooccurrence():
+    """Get the pairs of issues most often reported on the same submission."""
+    try:
+        scope, limit = cooccurrence_query(request.args)
+        pairs = store.issue_pairs(scope, limit)
+        return jsonify({"success": True, "scope": scope, "count": len(pairs), "pairs": pairs}), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
-@app.route('/score-summary', methods=['GET'])
-def get_summary():
-    """Get statistics across all submitted products."""
+@app.route('/issues/<path:issue>/related', methods=['GET'])
+def get_related_issues(issue):
+    """Get the issues most often reported together with one issue."""
     try:
-        if not submissions:
-            return jsonify({
-                "success": True,
-                "total_products": 0,
-                "average_score": 0,
-                "ratings": {},
-                "top_issues": []
-            }), 200
-        
-        scores = [s['score'] for s in submissions]
-        ratings = [s['rating'] for s in submissions]
+        scope, limit = cooccurrence_query(request.args)
+        related = store.related_issues(issue, scope, limit)
+        if related is None:
+            return jsonify({"success": False, "error": "Unknown issue"}), 404
+        return jsonify({"success": True, "scope": scope, "issue": issue, "related": related}), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/weights', methods=['GET'])
+def list_weight_profiles():
+    """List the named weight profiles requests can refer to with weights_profile."""
+    return jsonify({
+        "success": True,
+        "default": weight_profiles.default.id,
+        "profiles": [profile.to_dict() for profile in weight_profiles.profiles()]
+    }), 200
+
+@app.route('/weights/<profile_id>', methods=['GET'])
+def get_weight_profile(profile_id):
+    """Get one weight profile, named or interned from inline weights."""
+    profile = weight_profiles.get(profile_id)
+    if profile is None:
+        return jsonify({"success": False, "error": "Unknown weight profile"}), 404
+    return jsonify({"success": True, **profile.to_dict()}), 200
+
+@app.route('/weights', methods=['POST'])
+def create_weight_profile():
+    """Register a named weight profile; profiles are immutable once created."""
+    try:
+        data = parse_weight_profile_request(request.get_data())
+        profile, created = weight_profiles.register(data['id'], data['weights'], data.get('name'))
+        return jsonify({"success": True, **profile.to_dict()}), 201 if created else 200
+    except ProfileConflict as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    except InvalidRequest as e:
+        return jsonify({"success": False, "error": str(e), "details": e.details}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+@app.route('/llm-status', methods=['GET'])
+def get_llm_status():
+    """Get the Claude gateway's in-flight count, breaker state and retry budget."""
+    return jsonify({"success": True, **llm.stats()}), 200
+
+@app.route('/score/batch', methods=['POST'])
+def calculate_batch_scores():
+    """Score many products in one request (no AI suggestions)."""
+    try:
+        data = parse_batch_request(request.get_data())
+        products = data['products']
+        profile = weight_profiles.resolve(data.get('weights'), data.get('weights_profile'))
         
-        rating_counts = {}
-        for rating in ['A', 'B', 'C', 'D', 'F']:
-            rating_counts[rating] = ratings.count(rating)
+        count = len(products)
+        gwp = np.fromiter((p['gwp'] for p in products), dtype=float, count=count)
+        circularity = np.fromiter((p['circularity'] for p in products), dtype=float, count=count)
+        cost = np.fromiter((p['cost'] for p in products), dtype=float, count=count)
         
-        all_issues = []
-        for s in submissions:
-            all_issues.extend(s.get('issues', []))
+        scores = calculate_sustainability_scores(gwp, circularity, cost, profile)
+        ratings = get_ratings(scores)
         
-        issue_counts = {}
-        for issue in all_issues:
-            issue_counts[issue] = issue_counts.get(issue, 0) + 1
+        timestamp = datetime.now().isoformat()
+        records = []
+        for product, score, rating in zip(products, scores.tolist(), ratings.tolist()):
+            records.append({
+                **{field: value for field, value in product.items() if field not in REQUEST_ONLY_FIELDS},
+                "score": score,
+                "rating": rating,
+                "suggestions": [],
+                "suggestions_status": "none",
+                "issues": extract_issues(product['materials'], product['transport'], product['packaging']),
+                "timestamp": timestamp,
+                "weights_profile": profile.id
+            })
+        store.add_many(records)
         
-        top_issues = sorted(issue_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-        top_issues = [{"issue": issue, "count": count} for issue, count in top_issues]
+        results = [{
+            "id": record['id'],
+            "product_key": record['product_key'],
+            "version": record['version'],
+            "product_name": record['product_name'],
+            "sustainability_score": record['score'],
+            "rating": record['rating'],
+            "issues": record['issues']
+        } for record in records]
         
-        distribution = {
-            "min_score": min(scores),
-            "max_score": max(scores),
-            "median_score": statistics.median(scores),
-            "std_dev": round(statistics.stdev(scores), 2) if len(scores) > 1 else 0
+        response = {
+            "success": True,
+            "count": len(results),
+            "results": results,
+            "weights_profile": profile.id,
+            "timestamp": timestamp
         }
+        if data.get('suggestions') == 'bulk':
+            job = bulk_suggestions.start([record['id'] for record in records])
+            response["bulk_suggestion_job_id"] = job.id
+        
+        return jsonify(response), 200
+        
+    except InvalidRequest as e:
+        return jsonify({"success": False, "error": str(e), "details": e.details}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Internal error: {str(e)}"}), 500
+
+@app.route('/score/sensitivity', methods=['POST'])
+def score_sensitivity():
+    """Score one product or a catalog under every weighting on a simplex grid."""
+    try:
+        data = parse_sensitivity_request(request.get_data())
+        if (data.get('product') is None) == (data.get('products') is None):
+            raise ValueError("Send either 'product' or 'products'")
+        products = data.get('products') or [data['product']]
+        
+        grid = weight_grid(data['step'])
+        if len(products) * len(grid) > MAX_SENSITIVITY_CELLS:
+            raise ValueError(
+                f"{len(products)} products x {len(grid)} weightings exceeds {MAX_SENSITIVITY_CELLS} scores; "
+                "use a larger step or fewer products"
+            )
+        
+        components = score_components(
+            [p['gwp'] for p in products],
+            [p['circularity'] for p in products],
+            [p['cost'] for p in products]
+        )
+        scores = weighted_scores(components, grid)
+        ratings = get_ratings(scores)
         
         return jsonify({
             "success": True,
-            "total_products": len(submissions),
-            "average_score": round(statistics.mean(scores), 2),
-            "ratings": rating_counts,
-            "top_issues": top_issues,
-            "distribution": distribution,
-            "score_range": {
-                "excellent": sum(1 for s in scores if s >= 85),
-                "good": sum(1 for s in scores if 70 <= s < 85),
-                "fair": sum(1 for s in scores if 55 <= s < 70),
-                "poor": sum(1 for s in scores if 40 <= s < 55),
-                "failing": sum(1 for s in scores if s < 40)
-            }
+            "step": data['step'],
+            "grid": [
+                {"gwp": gwp, "circularity": circularity, "cost": cost}
+                for gwp, circularity, cost in np.round(grid, 6).tolist()
+            ],
+            "products": [{
+                "product_name": product['product_name'],
+                "scores": product_scores,
+                "ratings": product_ratings,
+                "min_score": min(product_scores),
+                "max_score": max(product_scores)
+            } for product, product_scores, product_ratings in zip(products, scores.tolist(), ratings.tolist())]
         }), 200
         
+    except InvalidRequest as e:
+        return jsonify({"success": False, "error": str(e), "details": e.details}), 400
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": f"Internal error: {str(e)}"}), 500
+
+def history_page(args):
+    """
+    One page of history for the given query args, newest first.
+    
+    Raises ValueError with a client-facing message for a bad limit, cursor
+    or since.
+    """
+    try:
+        limit = int(args.get('limit', HISTORY_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+    
+    cursor = args.get('cursor')
+    since = args.get('since')
+    try:
+        before = decode_cursor(cursor) if cursor else None
+        since = datetime.fromisoformat(since).isoformat() if since else None
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor or since: {str(e)}")
+    
+    history = store.page(limit + 1, before=before, since=since)
+    has_more = len(history) > limit
+    history = history[:limit]
+    
+    return {
+        "success": True,
+        "count": len(history),
+        "submissions": history,
+        "next_cursor": encode_cursor(history[-1]) if has_more else None
+    }
+
+@app.route('/history', methods=['GET'])
+def get_history():
+    """Get recent submissions, newest first, one page at a time."""
+    try:
+        return jsonify(history_page(request.args)), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def summary_scope(args):
+    """?scope=all (every submission) or latest (each product's latest version)."""
+    scope = args.get('scope', 'all')
+    if scope not in SUMMARY_SCOPES:
+        raise ValueError(f"scope must be one of: {', '.join(SUMMARY_SCOPES)}")
+    return scope
+
+def cooccurrence_query(args):
+    """The (scope, limit) an /issues co-occurrence request asked for; raises ValueError."""
+    try:
+        limit = int(args.get('limit', COOCCURRENCE_DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    return summary_scope(args), max(1, min(limit, COOCCURRENCE_MAX_LIMIT))
+
+def summary_query(args):
+    """
+    The (scope, quantiles) a /score-summary request asked for.
+
+    ?q=0.5,0.9,0.99 adds those quantiles of the score distribution.
+    Raises ValueError with a client-facing message for a bad scope or q.
+    """
+    scope = summary_scope(args)
+    quantiles = []
+    for value in args.get('q', '').split(','):
+        if not value.strip():
+            continue
+        try:
+            q = float(value)
+        except ValueError:
+            raise ValueError(f"q must be numbers between 0 and 1: {value.strip()}")
+        if not 0 <= q <= 1:
+            raise ValueError(f"q must be numbers between 0 and 1: {value.strip()}")
+        quantiles.append(q)
+    if len(quantiles) > SUMMARY_MAX_QUANTILES:
+        raise ValueError(f"At most {SUMMARY_MAX_QUANTILES} quantiles per request")
+    return scope, quantiles
+
+def ranked_products(args, descending):
+    """
+    Top or bottom k submissions by score for the given query args.
+    
+    Raises ValueError with a client-facing message for a bad k or rating.
+    """
+    try:
+        k = int(args.get('k', RANKING_DEFAULT_K))
+    except ValueError:
+        raise ValueError("k must be an integer")
+    k = max(1, min(k, RANKING_MAX_K))
+    
+    ratings = sorted({r.strip().upper() for r in args.get('rating', '').split(',') if r.strip()})
+    unknown = [r for r in ratings if r not in RATINGS]
+    if unknown:
+        raise ValueError(f"Unknown rating: {', '.join(unknown)}")
+    
+    products = store.ranked(k, descending, ratings or None, args.get('transport') or None)
+    return {"success": True, "count": len(products), "products": products}
+
+@app.route('/products/top', methods=['GET'])
+def get_top_products():
+    """Get the highest-scoring submissions, optionally filtered by rating and transport."""
+    try:
+        return jsonify(ranked_products(request.args, descending=True)), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/products/bottom', methods=['GET'])
+def get_bottom_products():
+    """Get the lowest-scoring submissions, optionally filtered by rating and transport."""
+    try:
+        return jsonify(ranked_products(request.args, descending=False)), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/products/<product_key>', methods=['GET'])
+def get_product(product_key):
+    """Get the latest version of a product by its product_key."""
+    record = store.latest(product_key)
+    if record is None:
+        return jsonify({"success": False, "error": "Unknown product"}), 404
+    return jsonify({"success": True, "product": record}), 200
+
+@app.route('/products/<product_key>/versions', methods=['GET'])
+def get_product_versions(product_key):
+    """Get every scored version of a product, newest first."""
+    versions = store.versions(product_key)
+    if not versions:
+        return jsonify({"success": False, "error": "Unknown product"}), 404
+    return jsonify({"success": True, "count": len(versions), "versions": versions}), 200
+
+def score_bound(args, name):
+    """An optional finite score filter from the query args; raises ValueError."""
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        bound = float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(bound):
+        raise ValueError(f"{name} must be a number")
+    return bound
+
+@app.route('/history/stream', methods=['GET'])
+def stream_history():
+    """Stream matching submissions, oldest first, as newline-delimited JSON."""
+    try:
+        ratings = [r.strip().upper() for r in request.args.get('rating', '').split(',') if r.strip()]
+        unknown = [r for r in ratings if r not in RATINGS]
+        if unknown:
+            raise ValueError(f"Unknown rating: {', '.join(unknown)}")
+        min_score = score_bound(request.args, 'min_score')
+        max_score = score_bound(request.args, 'max_score')
+        since = request.args.get('since')
+        until = request.args.get('until')
+        since = datetime.fromisoformat(since).isoformat() if since else None
+        until = datetime.fromisoformat(until).isoformat() if until else None
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid filter: {str(e)}"}), 400
+    
+    records = store.iter_records(
+        since=since,
+        until=until,
+        ratings=ratings,
+        min_score=min_score,
+        max_score=max_score
+    )
+    
+    def generate():
+        lines = []
+        for record in records:
+            lines.append(dumps(record))
+            if len(lines) >= STREAM_LINES_PER_CHUNK:
+                yield b'\n'.join(lines) + b'\n'
+                lines = []
+        if lines:
+            yield b'\n'.join(lines) + b'\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/score-summary', methods=['GET'])
+def get_summary():
+    """
+    Get statistics across all submissions, or with ?scope=latest only each product's latest version.
+
+    ?q=0.5,0.9,0.99 adds score quantiles, read from the maintained histogram.
+    """
+    try:
+        scope, quantiles = summary_query(request.args)
+        return jsonify({"success": True, "scope": scope, **store.summary(scope, quantiles)}), 200
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route('/score-summary/timeseries', methods=['GET'])
+def get_summary_timeseries():
+    """Get per-minute, per-hour or per-day score statistics from the maintained rollups."""
+    try:
+        bucket = request.args.get('bucket', 'hour')
+        if bucket not in TimeSeriesRollups.PREFIX_LENGTHS:
+            raise ValueError(f"bucket must be one of: {', '.join(TimeSeriesRollups.PREFIX_LENGTHS)}")
+        try:
+            limit = int(request.args.get('limit', TIMESERIES_MAX_BUCKETS))
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        limit = max(1, min(limit, TIMESERIES_MAX_BUCKETS))
+        
+        since = request.args.get('since')
+        until = request.args.get('until')
+        try:
+            since = datetime.fromisoformat(since).isoformat() if since else None
+            until = datetime.fromisoformat(until).isoformat() if until else None
+        except ValueError as e:
+            raise ValueError(f"Invalid since or until: {str(e)}")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    
+    try:
+        series = store.timeseries(bucket, since, until, limit)
+        return jsonify({"success": True, "bucket": bucket, "count": len(series), "series": series}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose latency histograms and counters in Prometheus text format."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/clear', methods=['POST'])
 def clear_data():
     """Clear all submission data (for testing)."""
-    global submissions
-    submissions = []
+    store.clear()
+    with suggestion_jobs_lock:
+        suggestion_jobs.clear()
+
     return jsonify({
         "success": True,
         "message": "All data cleared"
@@ -0,0 +1,170 @@
+"""
+ASGI entry point serving /score, /history, /score-summary and /clear.
+
+    uvicorn asgi:app --port 5001
+
+Scoring, the store and the suggestion cache are shared with the Flask app;
+the Claude call goes through anthropic.AsyncAnthropic, so a slow reply
+holds a coroutine instead of a worker thread.
+"""
+import asyncio
+import os
+from datetime import datetime
+
+import anthropic
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse as StarletteJSONResponse
+from starlette.routing import Route
+
+from app import (
+    FALLBACK_SUGGESTIONS,
+    SUGGESTION_MAX_TOKENS,
+    SUGGESTION_MODEL,
+    build_suggestion_prompt,
+    history_page,
+    parse_suggestions,
+    score_product,
+    store,
+    suggestion_cache,
+    suggestion_requests,
+    summary_query,
+    timed_stage
+)
+from cache import suggestion_cache_key
+from fastjson import dumps
+from llm import AsyncLLMGateway, make_async_http_client, make_llm_gateway
+from schemas import InvalidRequest, parse_score_request
+
+async_client = anthropic.AsyncAnthropic(
+    api_key=os.getenv("CLAUDE_API_KEY"),
+    base_url=os.getenv("CLAUDE_BASE_URL"),
+    max_retries=0,
+    http_client=make_async_http_client()
+)
+async_llm = make_llm_gateway(async_client, AsyncLLMGateway)
+suggestion_tasks = {}
+
+
+class JSONResponse(StarletteJSONResponse):
+    """JSON response encoded with the same orjson path as the Flask app."""
+
+    def render(self, content):
+        return dumps(content)
+
+
+async def fetch_suggestions(cache_key, product_data, score, rating):
+    prompt = build_suggestion_prompt(product_data, score, rating)
+
+    with timed_stage("llm"):
+        message = await async_llm.create(
+            model=SUGGESTION_MODEL,
+            max_tokens=SUGGESTION_MAX_TOKENS,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+    suggestions = parse_suggestions(message.content[0].text)
+    if suggestion_cache is not None and suggestions:
+        await run_in_threadpool(suggestion_cache.set, cache_key, suggestions)
+    return suggestions
+
+
+async def get_ai_suggestions(product_data, score, rating):
+    """Get AI-powered suggestions from Claude without blocking the event loop."""
+    try:
+        cache_key = suggestion_cache_key(product_data, score, rating)
+        if suggestion_cache is not None:
+            cached = await run_in_threadpool(suggestion_cache.get, cache_key)
+            if cached is not None:
+                suggestion_requests.inc("cache")
+                return cached
+
+        # Concurrent requests for the same prompt await one task; shield it so
+        # a disconnecting client does not cancel it for everyone else.
+        task = suggestion_tasks.get(cache_key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fetch_suggestions(cache_key, product_data, score, rating))
+            suggestion_tasks[cache_key] = task
+            task.add_done_callback(lambda _: suggestion_tasks.pop(cache_key, None))
+
+        suggestions = await asyncio.shield(task)
+        suggestion_requests.inc("coalesced" if shared else "claude")
+        return list(suggestions)
+
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        suggestion_requests.inc("fallback")
+        return list(FALLBACK_SUGGESTIONS)
+
+
+async def calculate_score(request):
+    """Calculate sustainability score for a product."""
+    try:
+        data = parse_score_request(await request.body())
+        # Resolving a weight profile may read or write the SQLite store.
+        result, submission_record = await run_in_threadpool(score_product, data)
+        suggestions = await get_ai_suggestions(data, submission_record['score'], submission_record['rating'])
+        result["suggestions"] = submission_record["suggestions"] = suggestions
+        submission_record["suggestions_status"] = "done"
+
+        # Stamp on store so a slow Claude reply does not sort behind newer submissions.
+        result["timestamp"] = submission_record["timestamp"] = datetime.now().isoformat()
+        await run_in_threadpool(store.add, submission_record)
+        result["id"] = submission_record['id']
+        result["product_key"] = submission_record['product_key']
+        result["version"] = submission_record['version']
+        return JSONResponse(result)
+
+    except InvalidRequest as e:
+        return JSONResponse({"success": False, "error": str(e), "details": e.details}, status_code=400)
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": f"Internal error: {str(e)}"}, status_code=500)
+
+
+async def get_history(request):
+    """Get recent submissions, newest first, one page at a time."""
+    try:
+        return JSONResponse(await run_in_threadpool(history_page, request.query_params))
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def get_summary(request):
+    """Get statistics across all submissions or latest versions, with ?q= score quantiles."""
+    try:
+        scope, quantiles = summary_query(request.query_params)
+        summary = await run_in_threadpool(store.summary, scope, quantiles)
+        return JSONResponse({"success": True, "scope": scope, **summary})
+    except ValueError as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=400)
+    except Exception as e:
+        return JSONResponse({"success": False, "error": str(e)}, status_code=500)
+
+
+async def clear_data(request):
+    """Clear all submission data (for testing)."""
+    await run_in_threadpool(store.clear)
+    return JSONResponse({"success": True, "message": "All data cleared"})
+
+
+app = Starlette(
+    routes=[
+        Route('/score', calculate_score, methods=['POST']),
+        Route('/history', get_history, methods=['GET']),
+        Route('/score-summary', get_summary, methods=['GET']),
+        Route('/clear', clear_data, methods=['POST'])
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(app, host='0.0.0.0', port=5001)
@@ -0,0 +1,151 @@
+"""Bulk suggestions through the Anthropic Message Batches API."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+MAX_REQUESTS_PER_BATCH = 100000
+MAX_TRACKED_JOBS = 1000
+
+
+class BulkSuggestionJob:
+    """Progress of one bulk suggestion run."""
+
+    def __init__(self, submission_ids):
+        self.id = uuid.uuid4().hex
+        self.submission_ids = list(submission_ids)
+        self.status = "queued"
+        self.batch_ids = []
+        self.submitted = 0
+        self.cached = 0
+        self.succeeded = 0
+        self.errored = 0
+        self.missing = 0
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.submission_ids),
+            "batch_ids": self.batch_ids,
+            "submitted": self.submitted,
+            "cached": self.cached,
+            "succeeded": self.succeeded,
+            "errored": self.errored,
+            "missing": self.missing,
+            "error": self.error
+        }
+
+
+class BulkSuggestionPipeline:
+    """
+    Fetches suggestions for many stored submissions with Message Batches.
+
+    Prompts are built exactly as get_ai_suggestions builds them. Cache hits
+    are applied straight away and the rest go out as one batch (split above
+    MAX_REQUESTS_PER_BATCH). The pipeline polls until every batch has ended,
+    then writes the parsed suggestions back onto the submissions. `client`
+    only needs messages.batches.create/retrieve/results, so an anthropic
+    client pointed at a local stand-in server works for testing.
+    """
+
+    def __init__(self, client, store, build_prompt, parse, model, max_tokens,
+                 cache=None, cache_key=None, poll_interval=30.0):
+        self.client = client
+        self.store = store
+        self.build_prompt = build_prompt
+        self.parse = parse
+        self.model = model
+        self.max_tokens = max_tokens
+        self.cache = cache
+        self.cache_key = cache_key
+        self.poll_interval = poll_interval
+        self._jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+
+    def start(self, submission_ids):
+        """Run a job on a background thread and return it immediately."""
+        job = BulkSuggestionJob(submission_ids)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+        threading.Thread(target=self.run, args=(job,), name=f"bulk-{job.id}", daemon=True).start()
+        return job
+
+    def get_job(self, job_id):
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def _key(self, record):
+        return self.cache_key(record, record['score'], record['rating'])
+
+    def run(self, job):
+        """Submit, poll and apply results for a job; blocks until done."""
+        records = {}
+        for submission_id in job.submission_ids:
+            record = self.store.get(submission_id)
+            if record is None:
+                job.missing += 1
+                continue
+            cached = self.cache.get(self._key(record)) if self.cache is not None else None
+            if cached is not None:
+                self.store.update_suggestions(submission_id, cached)
+                job.cached += 1
+            else:
+                records[submission_id] = record
+
+        # Batch custom_ids are strings; map them back without parsing.
+        custom_ids = {str(submission_id): submission_id for submission_id in records}
+        pending = set(records)
+        try:
+            job.status = "submitting"
+            self.store.set_suggestions_status(list(pending), "pending")
+            items = list(records.items())
+            for start in range(0, len(items), MAX_REQUESTS_PER_BATCH):
+                chunk = items[start:start + MAX_REQUESTS_PER_BATCH]
+                batch = self.client.messages.batches.create(requests=[{
+                    "custom_id": str(submission_id),
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": self.max_tokens,
+                        "messages": [{
+                            "role": "user",
+                            "content": self.build_prompt(record, record['score'], record['rating'])
+                        }]
+                    }
+                } for submission_id, record in chunk])
+                job.batch_ids.append(batch.id)
+                job.submitted += len(chunk)
+
+            job.status = "in_progress"
+            for batch_id in job.batch_ids:
+                self._wait(batch_id)
+                for entry in self.client.messages.batches.results(batch_id):
+                    submission_id = custom_ids.get(entry.custom_id)
+                    if submission_id is None:
+                        continue
+                    if entry.result.type != "succeeded":
+                        job.errored += 1
+                        continue
+                    suggestions = self.parse(entry.result.message.content[0].text)
+                    record = records[submission_id]
+                    self.store.update_suggestions(submission_id, suggestions)
+                    pending.discard(submission_id)
+                    if self.cache is not None and suggestions:
+                        self.cache.set(self._key(record), suggestions)
+                    job.succeeded += 1
+
+            job.status = "ended"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            if pending:
+                self.store.set_suggestions_status(list(pending), "none")
+        return job
+
+    def _wait(self, batch_id):
+        while self.client.messages.batches.retrieve(batch_id).processing_status != "ended":
+            time.sleep(self.poll_interval)
@@ -0,0 +1,9 @@
+"""
+Reproducible benchmarks for the scoring service.
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline results.json --output new.json
+
+Results are written as JSON together with the environment they were
+measured on; --baseline prints the change in median time per benchmark.
+"""
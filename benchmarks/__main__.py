@@ -0,0 +1,72 @@
+"""Command-line runner: python -m benchmarks --help"""
+import argparse
+import os
+import sys
+
+from benchmarks import harness
+
+SUITES = ("micro", "score", "store")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument('--suite', action='append', choices=SUITES,
+                        help="suite to run (repeatable; default: all)")
+    parser.add_argument('--repeat', type=int, default=7, help="timing rounds per benchmark")
+    parser.add_argument('--requests', type=int, default=500, help="/score requests to send")
+    parser.add_argument('--concurrency', type=int, default=16, help="concurrent /score clients")
+    parser.add_argument('--claude-latency', type=float, default=0.05, help="simulated Claude latency in seconds")
+    parser.add_argument('--claude-jitter', type=float, default=0.0, help="extra uniform random latency in seconds")
+    parser.add_argument('--sizes', default="1000,100000,1000000", help="stored submission counts for the store suite")
+    parser.add_argument('--store', choices=("memory", "sqlite"), default="memory", help="submission store backend")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against a previous results file")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="relative change reported as slower/faster")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="exit with status 1 if any benchmark is slower than the baseline")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    suites = args.suite or list(SUITES)
+
+    # The app reads its configuration at import time.
+    os.environ.setdefault("CLAUDE_API_KEY", "benchmark")
+    os.environ["SUBMISSION_STORE"] = "memory"
+    os.environ["SUGGESTION_CACHE"] = "off"
+    import app
+    from benchmarks import micro, service
+
+    results = {}
+    if "micro" in suites:
+        results.update(micro.run(app, args.repeat))
+    if "score" in suites:
+        results.update(service.run_score(
+            app, args.requests, args.concurrency, args.claude_latency, args.claude_jitter
+        ))
+    if "store" in suites:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+        results.update(service.run_store(app, sizes, args.store, args.repeat))
+
+    for name, result in sorted(results.items()):
+        print(f"{name:55} median {harness.format_seconds(result['median']):>9}  "
+              f"p95 {harness.format_seconds(result['p95']):>9}")
+
+    if args.output:
+        harness.write_results(args.output, results, vars(args))
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        rows = harness.compare(results, harness.load_results(args.baseline), args.tolerance)
+        print(f"\nAgainst {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for row in rows:
+            print(f"{row['name']:55} {harness.format_seconds(row['baseline']):>9} -> "
+                  f"{harness.format_seconds(row['current']):>9}  x{row['ratio']:<6} {row['verdict']}")
+        if args.fail_on_regression and any(row['verdict'] == "slower" for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""Timing, result files and baseline comparison shared by every benchmark."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, unit="s"):
+    """Latency statistics for a list of per-operation timings in seconds."""
+    ordered = sorted(samples)
+    return {
+        "unit": unit,
+        "samples": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": ordered[-1]
+    }
+
+
+def measure(fn, repeat=7, number=None, min_time=0.2):
+    """
+    Time fn() like timeit: `repeat` rounds of `number` calls each.
+
+    When number is None it is calibrated so one round takes at least
+    `min_time` seconds. Statistics are per call.
+    """
+    fn()
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - start) / number)
+
+    result = summarize(rounds)
+    result["calls_per_round"] = number
+    result["ops_per_sec"] = 1 / result["median"] if result["median"] else None
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """What a result was measured on, so runs are only compared like for like."""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "argv": sys.argv[1:]
+    }
+
+
+def write_results(path, results, settings):
+    document = {"environment": environment(), "settings": settings, "results": results}
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compare median timings against a baseline run.
+
+    Returns one row per benchmark present in both runs; `ratio` is
+    current / baseline, so anything above 1 + tolerance is a regression and
+    anything below 1 - tolerance an improvement.
+    """
+    rows = []
+    for name in sorted(set(results) & set(baseline)):
+        current, previous = results[name].get("median"), baseline[name].get("median")
+        if not current or not previous:
+            continue
+        ratio = current / previous
+        if ratio > 1 + tolerance:
+            verdict = "slower"
+        elif ratio < 1 - tolerance:
+            verdict = "faster"
+        else:
+            verdict = "same"
+        rows.append({"name": name, "baseline": previous, "current": current, "ratio": round(ratio, 3),
+                     "verdict": verdict})
+    return rows
+
+
+def format_seconds(value):
+    if value is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.3g}{unit}"
+    return f"{value / 1e-9:.3g}ns"
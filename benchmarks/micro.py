@@ -0,0 +1,51 @@
+"""Microbenchmarks for the scoring, rating and issue-matching functions."""
+import random
+
+from benchmarks.harness import measure
+
+SAMPLE_MATERIALS = ["cotton", "recycled polyester", "virgin plastic", "PVC", "aluminium", "bamboo", "glass"]
+SAMPLE_TRANSPORT = ["sea", "rail", "road", "air", "Air freight"]
+SAMPLE_PACKAGING = ["cardboard", "non-recyclable plastic", "compostable film", "none"]
+
+
+def sample_products(n, seed=0):
+    """Deterministic pseudo-random product payloads."""
+    rng = random.Random(seed)
+    return [{
+        "product_name": f"Product {i}",
+        "materials": rng.sample(SAMPLE_MATERIALS, rng.randint(1, 3)),
+        "transport": rng.choice(SAMPLE_TRANSPORT),
+        "packaging": rng.choice(SAMPLE_PACKAGING),
+        "gwp": round(rng.uniform(0, 120), 2),
+        "cost": round(rng.uniform(0, 1200), 2),
+        "circularity": round(rng.uniform(0, 100), 2)
+    } for i in range(n)]
+
+
+def run(app, repeat=7):
+    """Per-call timings for the hot functions of a single /score request."""
+    products = sample_products(1024)
+    scores = [app.calculate_sustainability_score(p['gwp'], p['circularity'], p['cost']) for p in products]
+    cycle = len(products) - 1
+    state = {"i": 0}
+
+    def next_index():
+        state["i"] = (state["i"] + 1) & cycle
+        return state["i"]
+
+    def score():
+        p = products[next_index()]
+        app.calculate_sustainability_score(p['gwp'], p['circularity'], p['cost'])
+
+    def rating():
+        app.get_rating(scores[next_index()])
+
+    def issues():
+        p = products[next_index()]
+        app.extract_issues(p['materials'], p['transport'], p['packaging'])
+
+    return {
+        "micro.calculate_sustainability_score": measure(score, repeat),
+        "micro.get_rating": measure(rating, repeat),
+        "micro.extract_issues": measure(issues, repeat)
+    }
@@ -0,0 +1,155 @@
+"""End-to-end benchmarks through the Flask app's routes."""
+import os
+import random
+from bisect import bisect_right
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from benchmarks.harness import measure, summarize
+from benchmarks.micro import sample_products
+from fake_anthropic import reply_text
+from storage import MemorySubmissionStore, SqliteSubmissionStore, encode_cursor
+
+POPULATE_CHUNK = 10000
+RATING_THRESHOLDS = (40, 55, 70, 85)
+
+
+class SimulatedClaude:
+    """
+    Stands in for the app's LLM gateway with a configurable reply latency.
+
+    Each call sleeps `latency` seconds plus up to `jitter` more, drawn
+    uniformly from a seeded generator, then returns a canned reply.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def create(self, **params):
+        with self._lock:
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            self.calls += 1
+        if delay:
+            time.sleep(delay)
+        text = reply_text(params['messages'][-1]['content'])
+        return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+    def stats(self):
+        return {"simulated": True, "latency": self.latency, "jitter": self.jitter, "calls": self.calls}
+
+
+def make_store(backend, directory):
+    if backend == "memory":
+        return MemorySubmissionStore()
+    return SqliteSubmissionStore(os.path.join(directory, f"bench-{time.monotonic_ns()}.db"))
+
+
+def run_score(app, requests=500, concurrency=16, latency=0.05, jitter=0.0):
+    """
+    POST /score `requests` times from `concurrency` threads.
+
+    Every product is distinct, so each request pays for one simulated
+    Claude call. Reports per-request latency and overall throughput.
+    """
+    app.llm = SimulatedClaude(latency, jitter)
+    app.suggestion_cache = None
+    products = sample_products(requests, seed=1)
+    clients = threading.local()
+
+    def post(product):
+        client = getattr(clients, 'client', None)
+        if client is None:
+            client = clients.client = app.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/score', json=product)
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(post, products))
+    elapsed = time.perf_counter() - start
+
+    result = summarize([seconds for seconds, _ in outcomes])
+    result.update({
+        "requests": requests,
+        "concurrency": concurrency,
+        "claude_latency": latency,
+        "claude_jitter": jitter,
+        "errors": sum(1 for _, status in outcomes if status != 200),
+        "wall_time": elapsed,
+        "requests_per_sec": requests / elapsed
+    })
+    return {"service.score": result}
+
+
+def synthetic_records(n, seed=2):
+    """Stored-submission records with strictly increasing timestamps."""
+    products = sample_products(min(n, 4096), seed=seed)
+    base = datetime(2025, 1, 1)
+    for i in range(n):
+        product = products[i % len(products)]
+        score = round(100 - product['gwp'] * 0.4 - product['cost'] / 100 + product['circularity'] * 0.3, 2)
+        yield {
+            **product,
+            "score": score,
+            "rating": "FDCBA"[bisect_right(RATING_THRESHOLDS, score)],
+            "suggestions": [],
+            "issues": [],
+            "suggestions_status": "none",
+            "timestamp": (base + timedelta(seconds=i)).isoformat(),
+            "weights_profile": "default"
+        }
+
+
+def populate(store, n):
+    """Fill the store with n records; returns the one in the middle."""
+    middle = None
+    batch = []
+    for i, record in enumerate(synthetic_records(n)):
+        batch.append(record)
+        if i == n // 2:
+            middle = record
+        if len(batch) >= POPULATE_CHUNK:
+            store.add_many(batch)
+            batch = []
+    if batch:
+        store.add_many(batch)
+    return middle
+
+
+def run_store(app, sizes=(1000, 100000, 1000000), backend="memory", repeat=7):
+    """/history and /score-summary cost at each stored-submission count."""
+    results = {}
+    client = app.app.test_client()
+    original_store = app.store
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            app.store = store = make_store(backend, directory)
+            started = time.perf_counter()
+            middle = populate(store, size)
+            prefix = f"store.{backend}.{size}"
+            results[f"{prefix}.populate"] = summarize([(time.perf_counter() - started) / size])
+
+            start = time.perf_counter()
+            client.get('/score-summary')
+            results[f"{prefix}.score_summary_cold"] = summarize([time.perf_counter() - start])
+
+            cursor = encode_cursor(middle)
+            results[f"{prefix}.score_summary"] = measure(lambda: client.get('/score-summary'), repeat)
+            results[f"{prefix}.history_first_page"] = measure(lambda: client.get('/history?limit=100'), repeat)
+            results[f"{prefix}.history_deep_page"] = measure(
+                lambda: client.get(f'/history?limit=100&cursor={cursor}'), repeat
+            )
+            results[f"{prefix}.history_since"] = measure(
+                lambda: client.get(f"/history?limit=100&since={middle['timestamp']}"), repeat
+            )
+    app.store = original_store
+    return results
@@ -0,0 +1,242 @@
+"""Caches for Claude suggestions, keyed on a hash of the prompt inputs."""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+TEXT_KEY_FIELDS = ('product_name', 'transport', 'packaging')
+NUMERIC_KEY_FIELDS = ('gwp', 'cost', 'circularity')
+
+
+def _normalize_text(value):
+    return ' '.join(str(value).lower().split())
+
+
+def _normalize_number(value):
+    try:
+        return round(float(value), 4)
+    except (TypeError, ValueError):
+        return _normalize_text(value)
+
+
+def suggestion_cache_key(product_data, score, rating):
+    """
+    Canonical hash of the inputs that go into the suggestion prompt.
+
+    Text is case- and whitespace-folded, materials are order-independent and
+    numbers are compared by value, so near-identical payloads share a key.
+    """
+    materials = product_data.get('materials') or []
+    if isinstance(materials, str):
+        materials = [materials]
+
+    payload = {field: _normalize_text(product_data.get(field, '')) for field in TEXT_KEY_FIELDS}
+    payload.update({field: _normalize_number(product_data.get(field)) for field in NUMERIC_KEY_FIELDS})
+    payload['materials'] = sorted(_normalize_text(m) for m in materials)
+    payload['score'] = round(float(score), 2)
+    payload['rating'] = rating
+
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class MemorySuggestionCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    backend = "memory"
+
+    def __init__(self, maxsize=1024, ttl=86400):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            suggestions, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(suggestions)
+
+    def set(self, key, suggestions):
+        with self._lock:
+            self._entries[key] = (list(suggestions), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "size": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+class SqliteSuggestionCache(MemorySuggestionCache):
+    """
+    On-disk LRU/TTL cache shared by every worker that opens the same file.
+
+    The size limit is enforced every PRUNE_INTERVAL writes rather than on
+    each one, so the table may briefly exceed maxsize.
+    """
+
+    backend = "sqlite"
+    PRUNE_INTERVAL = 64
+
+    def __init__(self, path, maxsize=100000, ttl=86400):
+        super().__init__(maxsize, ttl)
+        self.path = path
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS suggestion_cache (
+                key TEXT PRIMARY KEY,
+                suggestions TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_suggestion_cache_last_used ON suggestion_cache(last_used)"
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT suggestions, expires_at FROM suggestion_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM suggestion_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE suggestion_cache SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, suggestions):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO suggestion_cache (key, suggestions, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(list(suggestions)), now + self.ttl, now)
+            )
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune(now)
+
+    def _prune(self, now):
+        self._conn.execute("DELETE FROM suggestion_cache WHERE expires_at <= ?", (now,))
+        excess = len(self) - self.maxsize
+        if excess > 0:
+            self._conn.execute("""
+                DELETE FROM suggestion_cache WHERE key IN (
+                    SELECT key FROM suggestion_cache ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+            self.evictions += excess
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM suggestion_cache")
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM suggestion_cache").fetchone()[0]
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+
+    The first caller for a key runs the function; anyone arriving while it
+    is still running waits on the same Future and gets its result (or its
+    exception) instead of repeating the work.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return (result, shared), where shared is True for coalesced callers."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def __len__(self):
+        return len(self._calls)
+
+
+def make_suggestion_cache():
+    """Build the suggestion cache selected by SUGGESTION_CACHE (memory, sqlite or off)."""
+    backend = os.getenv("SUGGESTION_CACHE", "memory").lower()
+    ttl = float(os.getenv("SUGGESTION_CACHE_TTL", 86400))
+
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return MemorySuggestionCache(int(os.getenv("SUGGESTION_CACHE_SIZE", 1024)), ttl)
+    if backend == "sqlite":
+        return SqliteSuggestionCache(
+            os.getenv("SUGGESTION_CACHE_PATH", "suggestion_cache.db"),
+            int(os.getenv("SUGGESTION_CACHE_SIZE", 100000)),
+            ttl
+        )
+    raise ValueError(f"Unknown SUGGESTION_CACHE backend: {backend}")
@@ -0,0 +1,374 @@
+"""
+Local stand-in for the parts of the Anthropic API this service uses.
+
+    python fake_anthropic.py --port 8089 --latency lognormal:0.8,0.4 --error-rate 0.01 --rate-limit 50
+    CLAUDE_BASE_URL=http://127.0.0.1:8089 python app.py
+
+Point an anthropic client at it with base_url="http://127.0.0.1:8089" and
+any API key.
+
+POST /v1/messages answers with a canned reply after a delay drawn from
+--latency, streaming it as Server-Sent Events when the request asks for
+"stream": true. A share of calls fail with 500 (--error-rate) or 529
+(--overload-rate), and calls beyond --rate-limit per second get a 429 with
+a retry-after header.
+
+Message Batches are accepted, report "in_progress" for --batch-delay
+seconds, then end with one canned reply per request.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_SUGGESTIONS = [
+    "Replace virgin plastic components with recycled or bio-based alternatives",
+    "Shift long-haul shipments from air freight to sea or rail",
+    "Switch to mono-material, curbside-recyclable packaging",
+    "Design for disassembly so parts can be repaired or recovered",
+    "Source from suppliers powered by renewable electricity"
+]
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _isoformat(moment):
+    return moment.isoformat().replace('+00:00', 'Z') if moment else None
+
+
+def reply_text(prompt):
+    """A deterministic bulleted reply that mentions the product from the prompt."""
+    match = re.search(r'^Product: (.*)$', prompt, re.MULTILINE)
+    product = match.group(1).strip() if match else "this product"
+    bullets = [f"- {CANNED_SUGGESTIONS[0]} in {product}"] + [f"- {s}" for s in CANNED_SUGGESTIONS[1:]]
+    return '\n'.join(bullets)
+
+
+def parse_latency(spec):
+    """
+    Turn a latency spec into a function of a random.Random returning seconds.
+
+    Accepted forms: "0.5" (fixed), "uniform:LOW,HIGH", "normal:MEAN,STDDEV",
+    "exponential:MEAN" and "lognormal:MEDIAN,SIGMA". Samples are never negative.
+    """
+    kind, _, values = str(spec).partition(':')
+    if not values:
+        delay = float(kind)
+        return lambda rng: delay
+    try:
+        args = [float(value) for value in values.split(',')]
+        if kind == "uniform":
+            low, high = args
+            return lambda rng: rng.uniform(low, high)
+        if kind == "normal":
+            mean, stddev = args
+            return lambda rng: max(0.0, rng.gauss(mean, stddev))
+        if kind == "exponential":
+            (mean,) = args
+            return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+        if kind == "lognormal":
+            median, sigma = args
+            return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    except ValueError:
+        raise ValueError(f"Bad arguments in latency spec: {spec}")
+    raise ValueError(f"Unknown latency distribution: {kind}")
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` calls per second with bursts of up to `rate`."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Return 0 if the call may proceed, else the seconds until a token frees up."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+
+def _prompt_of(params):
+    messages = params.get('messages') or [{}]
+    content = messages[-1].get('content', '')
+    if isinstance(content, list):
+        content = ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+    return content
+
+
+def fake_message(params):
+    """A Messages API response object for the given request params."""
+    prompt = _prompt_of(params)
+    text = reply_text(prompt)
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": params.get('model', 'fake-model'),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": len(prompt.split()), "output_tokens": len(text.split())}
+    }
+
+
+class FakeAnthropicServer(ThreadingHTTPServer):
+    """HTTP server holding the fake API's configuration and batch state."""
+
+    daemon_threads = True
+
+    def __init__(self, address, batch_delay=2.0, verbose=False, latency="0", error_rate=0.0,
+                 overload_rate=0.0, rate_limit=None, chunk_interval=0.0, seed=None):
+        super().__init__(address, FakeAnthropicHandler)
+        self.batch_delay = batch_delay
+        self.verbose = verbose
+        self.latency = parse_latency(latency) if isinstance(latency, (str, int, float)) else latency
+        self.error_rate = error_rate
+        self.overload_rate = overload_rate
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.chunk_interval = chunk_interval
+        self.batches = {}
+        self.lock = threading.Lock()
+        self._rng = random.Random(seed)
+
+    def draw(self):
+        """Pick this call's fate: (delay in seconds, failure status or None)."""
+        with self.lock:
+            delay = self.latency(self._rng)
+            roll = self._rng.random()
+        if roll < self.error_rate:
+            return delay, 500
+        if roll < self.error_rate + self.overload_rate:
+            return delay, 529
+        return delay, None
+
+    def batch_view(self, batch, base_url):
+        ended = time.monotonic() - batch['started'] >= self.batch_delay
+        total = len(batch['requests'])
+        return {
+            "id": batch['id'],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else total,
+                "succeeded": total if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0
+            },
+            "created_at": _isoformat(batch['created_at']),
+            "expires_at": _isoformat(batch['created_at'] + timedelta(hours=24)),
+            "ended_at": _isoformat(batch['created_at'] + timedelta(seconds=self.batch_delay)) if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{base_url}/v1/messages/batches/{batch['id']}/results" if ended else None
+        }
+
+
+class FakeAnthropicHandler(BaseHTTPRequestHandler):
+    """Routes the subset of /v1 endpoints the backend calls."""
+
+    protocol_version = "HTTP/1.1"
+    BATCH_PATH = re.compile(r'^/v1/messages/batches/([\w-]+)(/results)?$')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host', '%s:%s' % self.server.server_address[:2])}"
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('request-id', f"req_{uuid.uuid4().hex[:24]}")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, error_type, message, headers=None):
+        self._send(status, {"type": "error", "error": {"type": error_type, "message": message}}, headers=headers)
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        if path == '/v1/messages':
+            return self._create_message()
+        if path == '/v1/messages/batches':
+            return self._create_batch()
+        self._error(404, "not_found_error", f"Unknown endpoint {path}")
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        match = self.BATCH_PATH.match(path)
+        if not match:
+            return self._error(404, "not_found_error", f"Unknown endpoint {path}")
+
+        with self.server.lock:
+            batch = self.server.batches.get(match.group(1))
+        if batch is None:
+            return self._error(404, "not_found_error", "Batch not found")
+
+        view = self.server.batch_view(batch, self._base_url())
+        if not match.group(2):
+            return self._send(200, view)
+        if view['processing_status'] != "ended":
+            return self._error(400, "invalid_request_error", "Batch is still processing")
+
+        lines = [json.dumps({
+            "custom_id": item['custom_id'],
+            "result": {"type": "succeeded", "message": fake_message(item.get('params', {}))}
+        }) for item in batch['requests']]
+        self._send(200, ('\n'.join(lines) + '\n').encode('utf-8'), content_type='application/x-jsonl')
+
+    def _create_message(self):
+        try:
+            params = self._read_json()
+        except ValueError:
+            return self._error(400, "invalid_request_error", "Body must be JSON")
+        if not params.get('messages'):
+            return self._error(400, "invalid_request_error", "messages: field required")
+
+        if self.server.rate_limiter is not None:
+            wait = self.server.rate_limiter.acquire()
+            if wait:
+                return self._error(429, "rate_limit_error", "Number of requests has exceeded your rate limit",
+                                   headers={"retry-after": str(max(1, math.ceil(wait)))})
+
+        delay, failure = self.server.draw()
+        time.sleep(delay)
+        if failure == 500:
+            return self._error(500, "api_error", "Internal server error")
+        if failure == 529:
+            return self._error(529, "overloaded_error", "Overloaded")
+
+        message = fake_message(params)
+        if params.get('stream'):
+            return self._stream_message(message)
+        self._send(200, message)
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream_message(self, message):
+        """Send a message as the Messages API's streaming event sequence."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.send_header('request-id', f"req_{uuid.uuid4().hex[:24]}")
+        self.end_headers()
+
+        def event(name, payload):
+            self._write_chunk(f"event: {name}\ndata: {json.dumps(payload)}\n\n".encode('utf-8'))
+
+        text = message['content'][0]['text']
+        usage = message['usage']
+        event("message_start", {"type": "message_start", "message": {
+            **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}
+        }})
+        event("content_block_start", {"type": "content_block_start", "index": 0,
+                                      "content_block": {"type": "text", "text": ""}})
+        event("ping", {"type": "ping"})
+        for piece in re.findall(r'\S+\s*', text):
+            if self.server.chunk_interval:
+                time.sleep(self.server.chunk_interval)
+            event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                          "delta": {"type": "text_delta", "text": piece}})
+        event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        event("message_delta", {"type": "message_delta",
+                                "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                "usage": {"output_tokens": usage['output_tokens']}})
+        event("message_stop", {"type": "message_stop"})
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _create_batch(self):
+        try:
+            requests = self._read_json().get('requests')
+        except ValueError:
+            return self._error(400, "invalid_request_error", "Body must be JSON")
+        if not isinstance(requests, list) or not requests:
+            return self._error(400, "invalid_request_error", "requests must be a non-empty list")
+
+        batch = {
+            "id": f"msgbatch_{uuid.uuid4().hex[:24]}",
+            "requests": requests,
+            "created_at": _now(),
+            "started": time.monotonic()
+        }
+        with self.server.lock:
+            self.server.batches[batch['id']] = batch
+        self._send(200, self.server.batch_view(batch, self._base_url()))
+
+
+def make_server(host="127.0.0.1", port=8089, **options):
+    """Create (but do not start) a fake server; port 0 picks a free port."""
+    return FakeAnthropicServer((host, port), **options)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--batch-delay', type=float, default=2.0, help="seconds before a batch ends")
+    parser.add_argument('--latency', default="0",
+                        help="/v1/messages delay: SECONDS, uniform:LOW,HIGH, normal:MEAN,STDDEV, "
+                             "exponential:MEAN or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--chunk-interval', type=float, default=0.0,
+                        help="seconds between streamed text deltas")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of calls failing with 500")
+    parser.add_argument('--overload-rate', type=float, default=0.0, help="share of calls failing with 529")
+    parser.add_argument('--rate-limit', type=float, help="calls per second before answering 429")
+    parser.add_argument('--seed', type=int, help="seed for latency and failure draws")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    try:
+        parse_latency(args.latency)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = make_server(
+        args.host,
+        args.port,
+        batch_delay=args.batch_delay,
+        verbose=args.verbose,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        overload_rate=args.overload_rate,
+        rate_limit=args.rate_limit,
+        chunk_interval=args.chunk_interval,
+        seed=args.seed
+    )
+    print(f"Fake Anthropic API listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""orjson-backed JSON for responses, streams and request bodies."""
+import json
+
+import orjson
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(obj):
+    """Compact UTF-8 JSON bytes; types orjson does not know fall back to Flask's encoder."""
+    try:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=OPTIONS)
+    except orjson.JSONEncodeError:
+        # orjson refuses some values the stdlib encodes, e.g. integers beyond
+        # 64 bits in extra product fields that are stored verbatim.
+        return json.dumps(
+            obj, default=DefaultJSONProvider.default, ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from bytes or str; raises ValueError (orjson.JSONDecodeError) if malformed."""
+    return orjson.loads(data)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider for app.json, used by jsonify and request.get_json.
+
+    Output is always compact and keys keep insertion order instead of being
+    sorted. NumPy scalars and arrays serialize natively.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,191 @@
+"""Keyword rules that turn product attributes into sustainability issues."""
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'issue_rules.json')
+
+FIELDS = ('materials', 'transport', 'packaging')
+MATCH_TYPES = ('contains', 'equals')
+
+IssueMatch = namedtuple('IssueMatch', ['issue', 'rule', 'field', 'value', 'keyword'])
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton: finds every keyword inside a string in a single pass."""
+
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for keyword in keywords:
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            if keyword not in self._output[state]:
+                self._output[state] += (keyword,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def search(self, text):
+        """Yield each keyword occurrence in text, in order of where it ends."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            yield from output[state]
+
+
+class CompiledRules:
+    """A validated rule set, with one automaton and one exact-match table per field."""
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._contains = {}
+        self._equals = {}
+
+        for field in FIELDS:
+            keyword_rules = {}
+            exact_rules = {}
+            for index, rule in enumerate(rules):
+                if rule['field'] != field:
+                    continue
+                target = keyword_rules if rule['match'] == 'contains' else exact_rules
+                for keyword in rule['keywords']:
+                    target.setdefault(keyword.lower(), []).append(index)
+            if keyword_rules:
+                self._contains[field] = (KeywordAutomaton(keyword_rules), keyword_rules)
+            if exact_rules:
+                self._equals[field] = exact_rules
+
+    def match_value(self, field, value):
+        """Fired (rule index, keyword) pairs for one attribute value, in rule order."""
+        lowered = value.lower()
+        fired = {}
+
+        for index in self._equals.get(field, {}).get(lowered, ()):
+            fired.setdefault(index, lowered)
+
+        if field in self._contains:
+            automaton, keyword_rules = self._contains[field]
+            for keyword in automaton.search(lowered):
+                for index in keyword_rules[keyword]:
+                    fired.setdefault(index, keyword)
+
+        return sorted(fired.items())
+
+
+def validate_rules(config):
+    """Check a parsed rules file and return its list of rules; raises ValueError."""
+    rules = config.get('rules') if isinstance(config, dict) else None
+    if not isinstance(rules, list):
+        raise ValueError("Rules file must contain a 'rules' list")
+
+    seen = set()
+    for position, rule in enumerate(rules):
+        label = rule.get('id', position) if isinstance(rule, dict) else position
+        if not isinstance(rule, dict) or not isinstance(rule.get('id'), str):
+            raise ValueError(f"Rule {label}: 'id' must be a string")
+        if rule['id'] in seen:
+            raise ValueError(f"Rule {label}: duplicate id")
+        seen.add(rule['id'])
+        if rule.get('field') not in FIELDS:
+            raise ValueError(f"Rule {label}: 'field' must be one of {', '.join(FIELDS)}")
+        if rule.get('match', 'contains') not in MATCH_TYPES:
+            raise ValueError(f"Rule {label}: 'match' must be one of {', '.join(MATCH_TYPES)}")
+        keywords = rule.get('keywords')
+        if not keywords or not all(isinstance(k, str) and k for k in keywords):
+            raise ValueError(f"Rule {label}: 'keywords' must be a non-empty list of strings")
+        if not isinstance(rule.get('issue'), str):
+            raise ValueError(f"Rule {label}: 'issue' must be a string")
+        rule.setdefault('match', 'contains')
+
+    return rules
+
+
+class IssueRuleEngine:
+    """
+    Matches products against the rules in a JSON file.
+
+    The file's modification time is checked at most every `reload_interval`
+    seconds and the rules are recompiled when it changes. A file that fails
+    to load leaves the previous rules in place and is reported as last_error.
+    """
+
+    def __init__(self, path=DEFAULT_RULES_PATH, reload_interval=2.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._compiled = None
+        self.reload()
+
+    def reload(self):
+        """Load and compile the rules file now; raises ValueError or OSError on failure."""
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path) as f:
+                compiled = CompiledRules(validate_rules(json.load(f)))
+            self._compiled = compiled
+            self._mtime = mtime
+            self._checked_at = time.monotonic()
+            self.last_error = None
+        return compiled
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if os.path.getmtime(self.path) != self._mtime:
+                self.reload()
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+
+    @property
+    def rules(self):
+        return self._compiled.rules
+
+    def match(self, materials, transport, packaging):
+        """Return an IssueMatch for every rule that fires, in the order issues are reported."""
+        self._reload_if_changed()
+        compiled = self._compiled
+        matches = []
+
+        for field, values in (('materials', materials), ('transport', [transport]), ('packaging', [packaging])):
+            for value in values:
+                for index, keyword in compiled.match_value(field, value):
+                    rule = compiled.rules[index]
+                    matches.append(IssueMatch(
+                        rule['issue'].replace('{value}', value),
+                        rule['id'],
+                        field,
+                        value,
+                        keyword
+                    ))
+
+        return matches
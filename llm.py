@@ -0,0 +1,351 @@
+"""Managed access to the Claude API: concurrency limit, retries and a circuit breaker."""
+import asyncio
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+
+import anthropic
+import httpx
+
+
+class LLMUnavailable(Exception):
+    """The call was short-circuited or gave up; callers should fall back."""
+
+
+class RetryBudget:
+    """
+    Token bucket that keeps retries to a fraction of calls.
+
+    Every call deposits `ratio` tokens and every retry spends one, so during
+    an outage retries add at most `ratio` extra load instead of multiplying it.
+    """
+
+    def __init__(self, ratio=0.2, capacity=20):
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    @property
+    def tokens(self):
+        return self._tokens
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures.
+
+    While open every call is rejected. After `reset_timeout` seconds a
+    single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give back a half-open trial that never reached the API."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+def is_retryable(error):
+    """Connection problems, timeouts, rate limits and 5xx/529 overloads are worth retrying."""
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class _GatewayPolicy:
+    """Settings and retry arithmetic shared by the sync and async gateways."""
+
+    def __init__(self, client, max_in_flight=16, acquire_timeout=5.0, call_timeout=30.0,
+                 max_retries=2, backoff_base=0.5, backoff_max=8.0, retry_budget=None, breaker=None):
+        self.client = client
+        self.max_in_flight = max_in_flight
+        self.acquire_timeout = acquire_timeout
+        self.call_timeout = call_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self._in_flight = 0
+        self._counter_lock = threading.Lock()
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _should_retry(self, error, attempt):
+        return is_retryable(error) and attempt < self.max_retries and self.retry_budget.withdraw()
+
+    def stats(self):
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retry_tokens": round(self.retry_budget.tokens, 2)
+        }
+
+
+class LLMGateway(_GatewayPolicy):
+    """
+    Wraps a shared anthropic client with the limits a multi-threaded server needs.
+
+    At most `max_in_flight` calls run at once; callers wait up to
+    `acquire_timeout` for a slot. Each attempt gets `call_timeout` seconds,
+    failures are retried with full-jitter exponential backoff while the
+    global retry budget allows, and repeated failures trip the breaker.
+    Every refusal surfaces as LLMUnavailable.
+    """
+
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+
+    @contextmanager
+    def _admitted(self):
+        """Hold an in-flight slot, after checking the breaker."""
+        if not self.breaker.allow():
+            raise LLMUnavailable("Claude circuit breaker is open")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self.breaker.release_trial()
+            raise LLMUnavailable("Too many Claude calls in flight")
+
+        with self._counter_lock:
+            self._in_flight += 1
+        try:
+            self.retry_budget.deposit()
+            yield
+        finally:
+            with self._counter_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _retry(self, error, attempt):
+        """Back off and return True if this failure should be retried."""
+        if self._should_retry(error, attempt):
+            time.sleep(self._backoff(attempt, error))
+            return True
+        return False
+
+    def create(self, **params):
+        """client.messages.create with the gateway's limits applied."""
+        with self._admitted():
+            attempt = 0
+            while True:
+                try:
+                    message = self.client.messages.create(timeout=self.call_timeout, **params)
+                    self.breaker.record_success()
+                    return message
+                except Exception as e:
+                    if self._retry(e, attempt):
+                        attempt += 1
+                        continue
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"Claude call failed: {e}") from e
+
+    def stream_text(self, timer=None, **params):
+        """
+        Yield text deltas from client.messages.stream with the gateway's limits applied.
+
+        A reader thread holds the in-flight slot (and `timer`, a context
+        manager factory, if given) only while it reads from the API, and
+        hands text over through a queue, so a slow consumer never holds a
+        slot. A failed attempt is only retried if it had not produced any
+        text yet. Closing the generator stops the reader at its next delta.
+        """
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+        reader = threading.Thread(target=self._read_stream, args=(params, timer, chunks, cancelled), daemon=True)
+        reader.start()
+        try:
+            while True:
+                kind, value = chunks.get()
+                if kind == "text":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            cancelled.set()
+
+    def _read_stream(self, params, timer, chunks, cancelled):
+        """Reader thread for stream_text: puts ("text", delta)..., then ("done"|"error", ...)."""
+        try:
+            with timer() if timer else nullcontext(), self._admitted():
+                attempt = 0
+                emitted = False
+                while True:
+                    try:
+                        with self.client.messages.stream(timeout=self.call_timeout, **params) as stream:
+                            for text in stream.text_stream:
+                                if cancelled.is_set():
+                                    break
+                                emitted = True
+                                chunks.put(("text", text))
+                        if emitted or not cancelled.is_set():
+                            self.breaker.record_success()
+                        else:
+                            self.breaker.release_trial()
+                        break
+                    except Exception as e:
+                        if not emitted and not cancelled.is_set() and self._retry(e, attempt):
+                            attempt += 1
+                            continue
+                        self.breaker.record_failure()
+                        raise LLMUnavailable(f"Claude stream failed: {e}") from e
+        except Exception as e:
+            chunks.put(("error", e))
+            return
+        chunks.put(("done", None))
+
+
+class AsyncLLMGateway(_GatewayPolicy):
+    """
+    LLMGateway for anthropic.AsyncAnthropic.
+
+    Same limits and retry policy, but waiting for a slot or a backoff
+    suspends the coroutine instead of blocking a thread.
+    """
+
+    def __init__(self, client, **options):
+        super().__init__(client, **options)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+
+    @asynccontextmanager
+    async def _admitted(self):
+        if not self.breaker.allow():
+            raise LLMUnavailable("Claude circuit breaker is open")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.breaker.release_trial()
+            raise LLMUnavailable("Too many Claude calls in flight")
+
+        self._in_flight += 1
+        try:
+            self.retry_budget.deposit()
+            yield
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    async def create(self, **params):
+        """await client.messages.create with the gateway's limits applied."""
+        async with self._admitted():
+            attempt = 0
+            while True:
+                try:
+                    message = await self.client.messages.create(timeout=self.call_timeout, **params)
+                    self.breaker.record_success()
+                    return message
+                except Exception as e:
+                    if self._should_retry(e, attempt):
+                        await asyncio.sleep(self._backoff(attempt, e))
+                        attempt += 1
+                        continue
+                    self.breaker.record_failure()
+                    raise LLMUnavailable(f"Claude call failed: {e}") from e
+
+
+def _pool_limits():
+    pool_size = int(os.getenv("CLAUDE_MAX_IN_FLIGHT", 16))
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=float(os.getenv("CLAUDE_KEEPALIVE_EXPIRY", 30))
+    )
+
+
+def make_http_client():
+    """Keep-alive connection pool sized to the gateway's concurrency (CLAUDE_MAX_IN_FLIGHT)."""
+    return anthropic.DefaultHttpxClient(limits=_pool_limits())
+
+
+def make_async_http_client():
+    """Async counterpart of make_http_client, for AsyncAnthropic."""
+    return anthropic.DefaultAsyncHttpxClient(limits=_pool_limits())
+
+
+def make_llm_gateway(client, gateway_class=LLMGateway):
+    """Build a gateway configured from CLAUDE_* environment variables."""
+    return gateway_class(
+        client,
+        max_in_flight=int(os.getenv("CLAUDE_MAX_IN_FLIGHT", 16)),
+        acquire_timeout=float(os.getenv("CLAUDE_ACQUIRE_TIMEOUT", 5)),
+        call_timeout=float(os.getenv("CLAUDE_TIMEOUT", 30)),
+        max_retries=int(os.getenv("CLAUDE_MAX_RETRIES", 2)),
+        retry_budget=RetryBudget(ratio=float(os.getenv("CLAUDE_RETRY_BUDGET", 0.2))),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("CLAUDE_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("CLAUDE_BREAKER_RESET", 30))
+        )
+    )
@@ -0,0 +1,161 @@
+"""Request schemas for the scoring endpoints, validated by pydantic-core."""
+import os
+from typing import List, Literal, Optional
+
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, model_validator
+
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 50000))
+MIN_SENSITIVITY_STEP = 0.01
+MAX_ERROR_DETAILS = 20
+
+
+class Weights(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    gwp: float
+    circularity: float
+    cost: float
+
+
+class Product(BaseModel):
+    """A product's scored fields. Unknown fields are kept and stored with the submission."""
+
+    model_config = ConfigDict(extra='allow', allow_inf_nan=False)
+
+    product_name: str
+    materials: List[str]
+    transport: str
+    packaging: str
+    gwp: float
+    cost: float
+    circularity: float
+
+
+class ScoreRequest(Product):
+    """One product to score."""
+
+    weights: Optional[Weights] = None
+    weights_profile: Optional[str] = None
+
+
+class BatchProduct(Product):
+    """One product of a batch; weights apply to the whole batch, so they are refused here."""
+
+    @model_validator(mode='before')
+    @classmethod
+    def no_item_weights(cls, data):
+        if isinstance(data, dict) and ('weights' in data or 'weights_profile' in data):
+            raise ValueError("weights and weights_profile are set for the whole batch, not per product")
+        return data
+
+
+class BatchScoreRequest(BaseModel):
+    products: List[BatchProduct] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    weights: Optional[Weights] = None
+    weights_profile: Optional[str] = None
+    suggestions: Optional[Literal['bulk']] = None
+
+
+class SensitivityProduct(BaseModel):
+    """Only the inputs the score depends on; other product fields are ignored."""
+
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    product_name: str = ''
+    gwp: float
+    cost: float
+    circularity: float
+
+
+class SensitivityRequest(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
+    product: Optional[SensitivityProduct] = None
+    products: Optional[List[SensitivityProduct]] = Field(None, min_length=1, max_length=MAX_BATCH_SIZE)
+    step: float = Field(0.05, ge=MIN_SENSITIVITY_STEP, le=0.5)
+
+
+class WeightProfileRequest(BaseModel):
+    id: str
+    name: Optional[str] = None
+    weights: Weights
+
+
+score_request_adapter = TypeAdapter(ScoreRequest)
+batch_request_adapter = TypeAdapter(BatchScoreRequest)
+sensitivity_request_adapter = TypeAdapter(SensitivityRequest)
+weight_profile_request_adapter = TypeAdapter(WeightProfileRequest)
+
+
+class InvalidRequest(ValueError):
+    """A request body that failed validation; str() is a one-line summary."""
+
+    def __init__(self, message, details):
+        super().__init__(message)
+        self.details = details
+
+
+def _describe(error):
+    """Turn a ValidationError into (summary message, per-error details)."""
+    errors = error.errors(include_url=False, include_input=False)
+    details = [{
+        "loc": '.'.join(str(part) for part in e['loc']),
+        "message": e['msg'],
+        "type": e['type']
+    } for e in errors[:MAX_ERROR_DETAILS]]
+
+    first = errors[0]
+    prefix = ''
+    loc = list(first['loc'])
+    if loc[:1] == ['products'] and len(loc) > 1 and isinstance(loc[1], int):
+        prefix = f"Product {loc[1]}: "
+        loc = loc[2:]
+
+    if first['type'] == 'missing':
+        scope = first['loc'][:-1]
+        missing = [str(e['loc'][-1]) for e in errors if e['type'] == 'missing' and e['loc'][:-1] == scope]
+        parent = '.'.join(str(part) for part in loc[:-1])
+        return f"{prefix}{parent + ': ' if parent else ''}Missing required fields: {', '.join(missing)}", details
+
+    field = '.'.join(str(part) for part in loc)
+    return f"{prefix}{field + ': ' if field else ''}{first['msg']}", details
+
+
+def load_json(body):
+    """Decode a request body; malformed JSON raises InvalidRequest like any other schema error."""
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        message = f"Invalid JSON: {e}"
+        raise InvalidRequest(message, [{"loc": "", "message": message, "type": "json_invalid"}])
+
+
+def _validate(adapter, body):
+    """Validate raw JSON bytes/str, or an already decoded object, into plain Python values."""
+    if isinstance(body, (bytes, bytearray, str)):
+        body = load_json(body)
+    try:
+        return adapter.dump_python(adapter.validate_python(body), exclude_unset=True)
+    except ValidationError as e:
+        raise InvalidRequest(*_describe(e))
+
+
+def parse_score_request(body):
+    """Validate a /score body (raw or parsed) into a plain dict with typed values; raises InvalidRequest."""
+    return _validate(score_request_adapter, body)
+
+
+def parse_batch_request(body):
+    """Validate a raw /score/batch body; per-item checks all run in pydantic-core."""
+    return _validate(batch_request_adapter, body)
+
+
+def parse_sensitivity_request(body):
+    """Validate a raw /score/sensitivity body; raises InvalidRequest."""
+    return _validate(sensitivity_request_adapter, body)
+
+
+def parse_weight_profile_request(body):
+    """Validate a raw POST /weights body; raises InvalidRequest."""
+    return _validate(weight_profile_request_adapter, body)
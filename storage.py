@@ -0,0 +1,674 @@
+"""Submission stores: an embedded SQLite database or an in-memory list."""
+import base64
+import hashlib
+import itertools
+import json
+import os
+import math
+import sqlite3
+import threading
+from bisect import bisect_left, bisect_right, insort
+
+from collections import Counter
+
+from analytics import RATING_SCORE_RANGES, RATINGS, RunningSummary, TimeSeriesRollups, bucket_dict
+from weights import INLINE_PREFIX, WeightProfile
+
+STREAM_CHUNK_SIZE = 1000
+TRANSPORT_KEY_SQL = "lower(trim(json_extract(record, '$.transport')))"
+
+
+SUMMARY_SCOPES = ('all', 'latest')
+
+
+def product_key(product_name):
+    """Stable key for a product: a hash of its case- and whitespace-folded name."""
+    normalized = ' '.join(str(product_name or '').lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:16]
+
+
+def transport_key(value):
+    """Normalized transport used by the ranking index (matches TRANSPORT_KEY_SQL)."""
+    return str(value or '').strip().lower()
+
+
+def record_matches(record, ratings=None, min_score=None, max_score=None):
+    """Whether a record passes the rating and score filters of iter_records."""
+    if ratings and record['rating'] not in ratings:
+        return False
+    if min_score is not None and record['score'] < min_score:
+        return False
+    if max_score is not None and record['score'] > max_score:
+        return False
+    return True
+
+
+def encode_cursor(record):
+    """Opaque pagination cursor pointing at a record's (timestamp, id)."""
+    raw = f"{record['timestamp']}|{record['id']}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Turn a cursor back into a (timestamp, id) tuple; raises ValueError if malformed."""
+    try:
+        timestamp, submission_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return timestamp, int(submission_id)
+    except (UnicodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class MemorySubmissionStore:
+    """
+    Keeps submissions in a process-local list (handy for tests).
+
+    The list is kept in (timestamp, id) order, so pages are sliced out with
+    a binary search instead of sorting the whole history. Sorted (score, id)
+    indexes of latest versions, overall and per transport, serve the
+    top/bottom rankings.
+
+    Rescoring a product appends a new version linked to the previous one;
+    a product_key -> latest record dict gives the current version in O(1)
+    and keeps a second summary over latest versions only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._weight_profiles = {}
+        # Ids keep counting across clear(), like SQLite's AUTOINCREMENT, so a
+        # late suggestion write for a cleared record cannot land on a new one.
+        self._ids = itertools.count(1)
+        self.clear()
+
+    def add(self, record):
+        return self.add_many([record])[0]
+
+    def add_many(self, records):
+        with self._lock:
+            for record in records:
+                record['id'] = next(self._ids)
+                key = (record['timestamp'], record['id'])
+                if not self._keys or key > self._keys[-1]:
+                    self._keys.append(key)
+                    self._records.append(record)
+                else:
+                    position = bisect_left(self._keys, key)
+                    self._keys.insert(position, key)
+                    self._records.insert(position, record)
+                self._by_id[record['id']] = record
+                record['product_key'] = product_key(record.get('product_name'))
+                previous = self._latest.get(record['product_key'])
+                record['version'] = previous['version'] + 1 if previous else 1
+                record['previous_id'] = previous['id'] if previous else None
+                self._latest[record['product_key']] = record
+                if previous:
+                    self._latest_summary.remove(previous['score'], previous['rating'], previous.get('issues', []))
+                    previous_key = (previous['score'], previous['id'])
+                    for index in (self._by_score, self._by_transport[transport_key(previous.get('transport'))]):
+                        del index[bisect_left(index, previous_key)]
+                self._latest_summary.add(record['score'], record['rating'], record.get('issues', []))
+                score_key = (record['score'], record['id'])
+                insort(self._by_score, score_key)
+                insort(self._by_transport.setdefault(transport_key(record.get('transport')), []), score_key)
+                self._summary.add(record['score'], record['rating'], record.get('issues', []))
+                self._rollups.add(record['timestamp'], record['score'], record['rating'])
+        return records
+
+    def get(self, submission_id):
+        return self._by_id.get(submission_id)
+
+    def latest(self, key):
+        """Current version of a product, by product_key."""
+        return self._latest.get(key)
+
+    def versions(self, key):
+        """Every version of a product, newest first, following the previous_id chain."""
+        with self._lock:
+            chain = []
+            record = self._latest.get(key)
+            while record is not None:
+                chain.append(record)
+                record = self._by_id.get(record['previous_id'])
+            return chain
+
+    def update_suggestions(self, submission_id, suggestions):
+        with self._lock:
+            record = self._by_id.get(submission_id)
+            if record is not None:
+                record['suggestions'] = suggestions
+                record['suggestions_status'] = "done"
+
+    def set_suggestions_status(self, submission_ids, status):
+        with self._lock:
+            for submission_id in submission_ids:
+                record = self._by_id.get(submission_id)
+                if record is not None:
+                    record['suggestions_status'] = status
+
+    def page(self, limit, before=None, since=None):
+        """Newest-first records older than the (timestamp, id) `before` and not older than `since`."""
+        with self._lock:
+            end = bisect_left(self._keys, before) if before else len(self._keys)
+            start = bisect_left(self._keys, (since,)) if since else 0
+            start = max(start, end - limit)
+            return self._records[start:end][::-1]
+
+    def iter_records(self, since=None, until=None, ratings=None, min_score=None, max_score=None):
+        """
+        Lazily yield matching records oldest first.
+
+        Walks the list in chunks, re-finding its place by (timestamp, id) each
+        time, so concurrent inserts never invalidate the iteration.
+        """
+        after = (since,) if since else ('',)
+        while True:
+            with self._lock:
+                start = bisect_right(self._keys, after)
+                chunk = self._records[start:start + STREAM_CHUNK_SIZE]
+            if not chunk:
+                return
+            for record in chunk:
+                if until and record['timestamp'] >= until:
+                    return
+                if record_matches(record, ratings, min_score, max_score):
+                    yield record
+            after = (chunk[-1]['timestamp'], chunk[-1]['id'])
+
+    def ranked(self, k, descending=True, ratings=None, transport=None):
+        """
+        The k highest (or lowest) scoring products, ties broken by id.
+
+        Only each product's latest version is in the score indexes. Each
+        rating is a score range of the index, so filters are binary
+        searches rather than scans.
+        """
+        with self._lock:
+            index = self._by_score if transport is None else self._by_transport.get(transport_key(transport), [])
+            keys = []
+            for low, high in [RATING_SCORE_RANGES[r] for r in ratings] if ratings else [(-math.inf, math.inf)]:
+                start = bisect_left(index, (low,))
+                end = bisect_left(index, (high,))
+                keys.extend(index[max(start, end - k):end] if descending else index[start:min(end, start + k)])
+            keys.sort(reverse=descending)
+            return [self._by_id[submission_id] for _, submission_id in keys[:k]]
+
+    def summary(self, scope="all", quantiles=()):
+        """Statistics over every submission, or only the latest version of each product."""
+        with self._lock:
+            return (self._latest_summary if scope == "latest" else self._summary).to_dict(quantiles)
+
+    def issue_pairs(self, scope="all", limit=None):
+        """Pairs of issues most often reported on the same submission."""
+        with self._lock:
+            return (self._latest_summary if scope == "latest" else self._summary).issue_pairs(limit)
+
+    def related_issues(self, issue, scope="all", limit=None):
+        """Issues most often reported together with `issue`; None if it never occurred."""
+        with self._lock:
+            return (self._latest_summary if scope == "latest" else self._summary).related_issues(issue, limit)
+
+    def timeseries(self, granularity, since=None, until=None, limit=None):
+        """Per-bucket statistics from the rollups maintained on insert."""
+        with self._lock:
+            return self._rollups.series(granularity, since, until, limit)
+
+    def save_weight_profile(self, profile):
+        """Store a profile unless its id is taken; returns whichever is stored."""
+        with self._lock:
+            return self._weight_profiles.setdefault(profile.id, profile)
+
+    def get_weight_profile(self, profile_id):
+        return self._weight_profiles.get(profile_id)
+
+    def weight_profiles(self):
+        with self._lock:
+            return [p for p in self._weight_profiles.values() if not p.id.startswith(INLINE_PREFIX)]
+
+    def clear(self):
+        with self._lock:
+            self._records = []
+            self._keys = []
+            self._by_id = {}
+            self._by_score = []
+            self._by_transport = {}
+            self._latest = {}
+            self._summary = RunningSummary()
+            self._latest_summary = RunningSummary()
+            self._rollups = TimeSeriesRollups()
+
+    def __len__(self):
+        return len(self._records)
+
+
+class SqliteSubmissionStore:
+    """
+    Persists submissions in a SQLite file shared by all workers.
+
+    Runs in WAL mode so readers never block the writer. Each thread gets its
+    own connection; add_many writes a whole batch in one transaction.
+
+    Summary aggregates live in memory and are caught up from rows with a
+    higher id than the last one folded in, so rows written by other workers
+    are picked up without rescanning the table. /clear bumps an epoch in
+    store_meta that tells every worker to start over.
+
+    Each row carries its product_key, version and previous_id; the
+    (product_key, version) index finds a product's latest version, and the
+    latest-only summary is caught up by swapping each row's predecessor out.
+    Older files are upgraded in place by MIGRATIONS (tracked in user_version).
+
+    score_rollups holds per-minute/hour/day aggregates, upserted in the same
+    transaction as the rows they count.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            product_name TEXT,
+            score REAL NOT NULL,
+            rating TEXT NOT NULL,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_submissions_timestamp ON submissions(timestamp, id);
+        CREATE INDEX IF NOT EXISTS idx_submissions_rating ON submissions(rating);
+        CREATE INDEX IF NOT EXISTS idx_submissions_score ON submissions(score);
+        CREATE INDEX IF NOT EXISTS idx_submissions_transport_score
+            ON submissions(lower(trim(json_extract(record, '$.transport'))), score);
+        CREATE TABLE IF NOT EXISTS store_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO store_meta (key, value) VALUES ('epoch', 0);
+        CREATE TABLE IF NOT EXISTS weight_profiles (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            gwp REAL NOT NULL,
+            circularity REAL NOT NULL,
+            cost REAL NOT NULL
+        );
+    """
+
+    MIGRATIONS = (
+        (
+            "ALTER TABLE submissions ADD COLUMN product_key TEXT",
+            "ALTER TABLE submissions ADD COLUMN version INTEGER",
+            "ALTER TABLE submissions ADD COLUMN previous_id INTEGER",
+            "CREATE INDEX IF NOT EXISTS idx_submissions_product ON submissions(product_key, version)"
+        ),
+        (
+            f"""CREATE TABLE IF NOT EXISTS score_rollups (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                min_score REAL NOT NULL,
+                max_score REAL NOT NULL,
+                {', '.join(f'rating_{r.lower()} INTEGER NOT NULL DEFAULT 0' for r in RATINGS)},
+                PRIMARY KEY (granularity, bucket)
+            ) WITHOUT ROWID""",
+        ) + tuple(
+            f"""INSERT INTO score_rollups
+                SELECT '{granularity}', substr(timestamp, 1, {length}), COUNT(*), SUM(score), MIN(score), MAX(score),
+                       {', '.join(f"SUM(rating = '{r}')" for r in RATINGS)}
+                FROM submissions GROUP BY substr(timestamp, 1, {length})"""
+            for granularity, length in TimeSeriesRollups.PREFIX_LENGTHS.items()
+        ),
+        (
+            "CREATE INDEX IF NOT EXISTS idx_submissions_previous ON submissions(previous_id)",
+        ),
+    )
+
+    ROLLUP_UPSERT = f"""
+        INSERT INTO score_rollups VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' * len(RATINGS))})
+        ON CONFLICT (granularity, bucket) DO UPDATE SET
+            count = count + excluded.count,
+            total = total + excluded.total,
+            min_score = min(min_score, excluded.min_score),
+            max_score = max(max_score, excluded.max_score),
+            {', '.join(f'rating_{r.lower()} = rating_{r.lower()} + excluded.rating_{r.lower()}' for r in RATINGS)}
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+        self._migrate()
+        self._summary_lock = threading.Lock()
+        self._summary = RunningSummary()
+        self._latest_summary = RunningSummary()
+        self._summary_epoch = None
+        self._last_summarized_id = 0
+
+    def _migrate(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, statements in enumerate(self.MIGRATIONS[current:], start=current + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                if version == 1:
+                    self._backfill_versions(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _backfill_versions(conn):
+        """Give rows written before product keys existed their key and version chain."""
+        latest = {}
+        updates = []
+        for submission_id, product_name in conn.execute("SELECT id, product_name FROM submissions ORDER BY id"):
+            key = product_key(product_name)
+            previous_id, previous_version = latest.get(key, (None, 0))
+            latest[key] = (submission_id, previous_version + 1)
+            updates.append((key, previous_version + 1, previous_id) * 2 + (submission_id,))
+        conn.executemany(
+            """UPDATE submissions
+               SET product_key = ?, version = ?, previous_id = ?,
+                   record = json_set(record, '$.product_key', ?, '$.version', ?, '$.previous_id', ?)
+               WHERE id = ?""",
+            updates
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_record(row):
+        record = json.loads(row[1])
+        record['id'] = row[0]
+        return record
+
+    def add(self, record):
+        return self.add_many([record])[0]
+
+    def add_many(self, records):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                record['product_key'] = product_key(record.get('product_name'))
+                previous = conn.execute(
+                    "SELECT id, version FROM submissions WHERE product_key = ? ORDER BY version DESC LIMIT 1",
+                    (record['product_key'],)
+                ).fetchone()
+                record['version'] = previous[1] + 1 if previous else 1
+                record['previous_id'] = previous[0] if previous else None
+                cursor = conn.execute(
+                    """INSERT INTO submissions
+                       (timestamp, product_name, score, rating, record, product_key, version, previous_id)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (record['timestamp'], record.get('product_name'), record['score'], record['rating'],
+                     json.dumps(record), record['product_key'], record['version'], record['previous_id'])
+                )
+                record['id'] = cursor.lastrowid
+            self._upsert_rollups(conn, records)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return records
+
+    def _upsert_rollups(self, conn, records):
+        batch = TimeSeriesRollups()
+        for record in records:
+            batch.add(record['timestamp'], record['score'], record['rating'])
+        conn.executemany(self.ROLLUP_UPSERT, [
+            (granularity, key, count, total, min_score, max_score, *(ratings.get(r, 0) for r in RATINGS))
+            for granularity in TimeSeriesRollups.PREFIX_LENGTHS
+            for key, (count, total, min_score, max_score, ratings) in batch.buckets(granularity)
+        ])
+
+    def get(self, submission_id):
+        row = self._conn().execute(
+            "SELECT id, record FROM submissions WHERE id = ?", (submission_id,)
+        ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def latest(self, key):
+        """Current version of a product, by product_key."""
+        row = self._conn().execute(
+            "SELECT id, record FROM submissions WHERE product_key = ? ORDER BY version DESC LIMIT 1", (key,)
+        ).fetchone()
+        return self._row_to_record(row) if row else None
+
+    def versions(self, key):
+        """Every version of a product, newest first."""
+        rows = self._conn().execute(
+            "SELECT id, record FROM submissions WHERE product_key = ? ORDER BY version DESC", (key,)
+        )
+        return [self._row_to_record(row) for row in rows]
+
+    def update_suggestions(self, submission_id, suggestions):
+        self._conn().execute(
+            """UPDATE submissions
+               SET record = json_set(record, '$.suggestions', json(?), '$.suggestions_status', 'done')
+               WHERE id = ?""",
+            (json.dumps(suggestions), submission_id)
+        )
+
+    def set_suggestions_status(self, submission_ids, status):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE submissions SET record = json_set(record, '$.suggestions_status', ?) WHERE id = ?",
+                [(status, submission_id) for submission_id in submission_ids]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def page(self, limit, before=None, since=None):
+        """Newest-first records older than the (timestamp, id) `before` and not older than `since`."""
+        clauses, params = [], []
+        if before:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend(before)
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT id, record FROM submissions {where} ORDER BY timestamp DESC, id DESC LIMIT ?",
+            (*params, limit)
+        )
+        return [self._row_to_record(row) for row in rows]
+
+    def iter_records(self, since=None, until=None, ratings=None, min_score=None, max_score=None):
+        """
+        Lazily yield matching records oldest first.
+
+        Filters run in SQL and rows are fetched in keyset-paginated chunks,
+        so no read transaction is held open for the whole export.
+        """
+        clauses, params = ["(timestamp, id) > (?, ?)"], []
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if ratings:
+            clauses.append(f"rating IN ({', '.join('?' * len(ratings))})")
+            params.extend(ratings)
+        if min_score is not None:
+            clauses.append("score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("score <= ?")
+            params.append(max_score)
+        query = (
+            f"SELECT id, record, timestamp FROM submissions WHERE {' AND '.join(clauses)} "
+            "ORDER BY timestamp, id LIMIT ?"
+        )
+
+        after = (since or '', 0)
+        while True:
+            rows = self._conn().execute(query, (*after, *params, STREAM_CHUNK_SIZE)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield self._row_to_record(row)
+            after = (rows[-1][2], rows[-1][0])
+            if len(rows) < STREAM_CHUNK_SIZE:
+                return
+
+    def ranked(self, k, descending=True, ratings=None, transport=None):
+        """
+        The k highest (or lowest) scoring products, ties broken by id.
+
+        Walks the score index (or the per-transport expression index) from
+        one end, skipping superseded versions with a probe of the
+        previous_id index; a rating filter also bounds the walk to its
+        score range.
+        """
+        clauses = ["NOT EXISTS (SELECT 1 FROM submissions newer WHERE newer.previous_id = submissions.id)"]
+        params = []
+        if ratings:
+            clauses.append(f"rating IN ({', '.join('?' * len(ratings))})")
+            params.extend(ratings)
+            ranges = [RATING_SCORE_RANGES[r] for r in ratings]
+            low, high = min(r[0] for r in ranges), max(r[1] for r in ranges)
+            if low > -math.inf:
+                clauses.append("score >= ?")
+                params.append(low)
+            if high < math.inf:
+                clauses.append("score < ?")
+                params.append(high)
+        if transport is not None:
+            clauses.append(f"{TRANSPORT_KEY_SQL} = ?")
+            params.append(transport_key(transport))
+        where = f"WHERE {' AND '.join(clauses)}"
+        order = "DESC" if descending else "ASC"
+        rows = self._conn().execute(
+            f"SELECT id, record FROM submissions {where} ORDER BY score {order}, id {order} LIMIT ?",
+            (*params, k)
+        )
+        return [self._row_to_record(row) for row in rows]
+
+    def _summarized(self, scope):
+        """
+        The running summary for a scope, after folding in rows added since
+        the last call (by any process). Call with _summary_lock held.
+        """
+        conn = self._conn()
+        epoch = conn.execute("SELECT value FROM store_meta WHERE key = 'epoch'").fetchone()[0]
+        if epoch != self._summary_epoch:
+            self._summary = RunningSummary()
+            self._latest_summary = RunningSummary()
+            self._summary_epoch = epoch
+            self._last_summarized_id = 0
+
+        # A predecessor always has a lower id, so it was folded in before
+        # the row that replaces it.
+        rows = conn.execute(
+            """SELECT s.id, s.score, s.rating, json_extract(s.record, '$.issues'),
+                      p.score, p.rating, json_extract(p.record, '$.issues')
+               FROM submissions s LEFT JOIN submissions p ON p.id = s.previous_id
+               WHERE s.id > ? ORDER BY s.id""",
+            (self._last_summarized_id,)
+        )
+        for submission_id, score, rating, issues, previous_score, previous_rating, previous_issues in rows:
+            issues = json.loads(issues) if issues else []
+            self._summary.add(score, rating, issues)
+            if previous_score is not None:
+                self._latest_summary.remove(
+                    previous_score, previous_rating, json.loads(previous_issues) if previous_issues else []
+                )
+            self._latest_summary.add(score, rating, issues)
+            self._last_summarized_id = submission_id
+
+        return self._latest_summary if scope == "latest" else self._summary
+
+    def summary(self, scope="all", quantiles=()):
+        """Statistics over every submission, or only the latest version of each product."""
+        with self._summary_lock:
+            return self._summarized(scope).to_dict(quantiles)
+
+    def issue_pairs(self, scope="all", limit=None):
+        """Pairs of issues most often reported on the same submission."""
+        with self._summary_lock:
+            return self._summarized(scope).issue_pairs(limit)
+
+    def related_issues(self, issue, scope="all", limit=None):
+        """Issues most often reported together with `issue`; None if it never occurred."""
+        with self._summary_lock:
+            return self._summarized(scope).related_issues(issue, limit)
+
+    def timeseries(self, granularity, since=None, until=None, limit=None):
+        """Per-bucket statistics read from the score_rollups table."""
+        length = TimeSeriesRollups.PREFIX_LENGTHS[granularity]
+        clauses, params = ["granularity = ?"], [granularity]
+        if since:
+            clauses.append("bucket >= ?")
+            params.append(since[:length])
+        if until:
+            clauses.append("bucket <= ?")
+            params.append(until[:length])
+        rows = self._conn().execute(
+            f"""SELECT bucket, count, total, min_score, max_score,
+                       {', '.join(f'rating_{r.lower()}' for r in RATINGS)}
+                FROM score_rollups WHERE {' AND '.join(clauses)} ORDER BY bucket DESC LIMIT ?""",
+            (*params, -1 if limit is None else limit)
+        ).fetchall()
+        return [
+            bucket_dict(granularity, key, count, total, min_score, max_score, Counter(dict(zip(RATINGS, counts))))
+            for key, count, total, min_score, max_score, *counts in reversed(rows)
+        ]
+
+    def save_weight_profile(self, profile):
+        """Store a profile unless its id is taken; returns whichever is stored."""
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR IGNORE INTO weight_profiles (id, name, gwp, circularity, cost) VALUES (?, ?, ?, ?, ?)",
+            tuple(profile)
+        )
+        return self.get_weight_profile(profile.id)
+
+    def get_weight_profile(self, profile_id):
+        row = self._conn().execute(
+            "SELECT id, name, gwp, circularity, cost FROM weight_profiles WHERE id = ?", (profile_id,)
+        ).fetchone()
+        return WeightProfile(*row) if row else None
+
+    def weight_profiles(self):
+        rows = self._conn().execute(
+            "SELECT id, name, gwp, circularity, cost FROM weight_profiles WHERE id NOT LIKE ? ORDER BY id",
+            (INLINE_PREFIX + '%',)
+        )
+        return [WeightProfile(*row) for row in rows]
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM submissions")
+            conn.execute("DELETE FROM score_rollups")
+            conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'epoch'")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+
+def make_submission_store():
+    """Build the store selected by SUBMISSION_STORE (sqlite or memory)."""
+    backend = os.getenv("SUBMISSION_STORE", "sqlite").lower()
+    if backend == "sqlite":
+        return SqliteSubmissionStore(os.getenv("SUBMISSION_DB", "submissions.db"))
+    if backend == "memory":
+        return MemorySubmissionStore()
+    raise ValueError(f"Unknown SUBMISSION_STORE backend: {backend}")
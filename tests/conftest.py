@@ -0,0 +1,4 @@
+import os
+
+# Importing app builds the submission store; keep tests off the default SQLite file.
+os.environ.setdefault("SUBMISSION_STORE", "memory")
@@ -0,0 +1,84 @@
+import random
+import statistics
+
+import pytest
+
+from analytics import RunningSummary
+
+ISSUES = ["Air transport (high emissions)", "Non-recyclable packaging", "Plastic material used", "High cost"]
+RATINGS = "ABCDF"
+
+
+def random_submission(rng):
+    return (round(rng.uniform(0, 100), 2), rng.choice(RATINGS), rng.sample(ISSUES, rng.randint(0, 3)))
+
+
+def rebuilt(submissions):
+    summary = RunningSummary()
+    for submission in submissions:
+        summary.add(*submission)
+    return summary
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_remove_matches_rebuilding(seed):
+    rng = random.Random(seed)
+    kept = []
+    summary = RunningSummary()
+    for _ in range(300):
+        if kept and rng.random() < 0.4:
+            submission = kept.pop(rng.randrange(len(kept)))
+            summary.remove(*submission)
+        else:
+            submission = random_submission(rng)
+            kept.append(submission)
+            summary.add(*submission)
+
+        expected = rebuilt(kept)
+        assert summary.count == expected.count
+        assert summary.ratings == expected.ratings
+        assert summary.ranges == expected.ranges
+        assert summary.issues == expected.issues
+        assert summary.quantiles([0, 0.5, 0.9, 1]) == expected.quantiles([0, 0.5, 0.9, 1])
+        assert summary.issue_pairs() == expected.issue_pairs()
+        if kept:
+            scores = [score for score, _, _ in kept]
+            assert summary.min == min(scores)
+            assert summary.max == max(scores)
+            assert summary.mean == pytest.approx(statistics.fmean(scores))
+            if len(kept) > 1:
+                assert summary.stdev == pytest.approx(statistics.stdev(scores))
+
+
+def test_removing_extremes_falls_back_to_histogram():
+    summary = RunningSummary()
+    for score in (10.0, 50.0, 90.0):
+        summary.add(score, "C", [])
+    summary.remove(10.0, "C", [])
+    summary.remove(90.0, "C", [])
+    assert (summary.min, summary.max) == (50.0, 50.0)
+
+
+def test_removing_last_submission_resets():
+    summary = RunningSummary()
+    summary.add(42.0, "C", ["High cost"])
+    summary.remove(42.0, "C", ["High cost"])
+    assert summary.to_dict() == RunningSummary().to_dict()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_quantiles_match_linear_interpolation(seed):
+    rng = random.Random(seed)
+    scores = sorted(round(rng.uniform(0, 100), 2) for _ in range(rng.randint(1, 200)))
+    summary = rebuilt([(score, "C", []) for score in scores])
+    for q in (0, 0.01, 0.25, 0.5, 0.9, 0.99, 1):
+        position = q * (len(scores) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(scores) - 1)
+        expected = scores[lower] + (scores[upper] - scores[lower]) * (position - lower)
+        assert summary.histogram.quantile(q) == pytest.approx(expected, abs=1e-4)
+    assert summary.histogram.median() == pytest.approx(statistics.median(scores), abs=1e-4)
+
+
+def test_quantiles_of_an_empty_summary_are_none():
+    assert RunningSummary().to_dict([0.5])['quantiles'] == {"0.5": None}
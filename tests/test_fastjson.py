@@ -0,0 +1,12 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+from fastjson import dumps  # noqa: E402
+
+
+def test_integers_beyond_64_bits_fall_back_to_stdlib():
+    record = {"product_name": "Café", "sku": 123456789012345678901234567890}
+    assert json.loads(dumps(record)) == record
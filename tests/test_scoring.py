@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("flask")
+
+import app  # noqa: E402
+
+WEIGHTINGS = [
+    None,
+    {"gwp": 0.5, "circularity": 0.3, "cost": 0.2},
+    {"gwp": 0.0, "circularity": 0.0, "cost": 1.0},
+]
+
+
+def random_products(n, seed=0):
+    rng = random.Random(seed)
+    products = [(round(rng.uniform(-10, 110), 2), round(rng.uniform(-10, 110), 2), round(rng.uniform(-50, 1050), 2))
+                for _ in range(n)]
+    # Rounds to 54.99 with round() but 55.0 with np.round.
+    products.append((12.15, 35.53, 703.22))
+    return products
+
+
+@pytest.mark.parametrize("weights", WEIGHTINGS)
+def test_vectorized_scores_match_scalar(weights):
+    products = random_products(50000)
+    gwp, circularity, cost = (np.array(column) for column in zip(*products))
+
+    scores = app.calculate_sustainability_scores(gwp, circularity, cost, weights)
+    expected = [app.calculate_sustainability_score(*product, weights) for product in products]
+
+    assert scores.tolist() == expected
+    assert app.get_ratings(scores).tolist() == [app.get_rating(score) for score in expected]
+
+
+def test_sensitivity_grid_matches_scalar_at_default_weights():
+    products = random_products(2000, seed=1)
+    grid = app.weight_grid(0.05)
+    default = app.weight_profiles.default
+    column = [tuple(row) for row in grid.tolist()].index((default.gwp, default.circularity, default.cost))
+
+    scores = app.weighted_scores(app.score_components(*zip(*products)), grid)
+
+    assert scores[:, column].tolist() == [app.calculate_sustainability_score(*product) for product in products]
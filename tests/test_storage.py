@@ -0,0 +1,252 @@
+import json
+import random
+import sqlite3
+from bisect import bisect_right
+
+import pytest
+
+from analytics import RATING_SCORE_RANGES
+from storage import MemorySubmissionStore, SqliteSubmissionStore, product_key, transport_key
+
+ISSUES = ["Air transport (high emissions)", "Non-recyclable packaging", "Plastic material used", "High cost"]
+TRANSPORTS = ["air", "Sea", " road "]
+RANKING_FILTERS = [
+    (ratings, transport)
+    for ratings in (None, ["A"], ["C"], ["D", "F"], ["A", "C", "F"])
+    for transport in (None, "air", "SEA", "rail")
+]
+PRODUCTS = 40
+# get_rating's thresholds in app.py: F below 40, then D, C, B, and A from 85.
+RATING_THRESHOLDS = (40, 55, 70, 85)
+
+# The submissions table as it was before product versions and rollups.
+V0_SCHEMA = """
+    CREATE TABLE submissions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT NOT NULL,
+        product_name TEXT,
+        score REAL NOT NULL,
+        rating TEXT NOT NULL,
+        record TEXT NOT NULL
+    );
+    CREATE INDEX idx_submissions_timestamp ON submissions(timestamp, id);
+    CREATE INDEX idx_submissions_rating ON submissions(rating);
+    CREATE INDEX idx_submissions_score ON submissions(score);
+"""
+
+
+def rating_for(score):
+    return "FDCBA"[bisect_right(RATING_THRESHOLDS, score)]
+
+
+def make_records(n, seed=0):
+    """Submissions for a few dozen products, so most get rescored; some scores sit on a threshold."""
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        score = float(rng.choice(RATING_THRESHOLDS)) if rng.random() < 0.05 else round(rng.uniform(0, 100), 2)
+        records.append({
+            "product_name": f"Product {rng.randrange(PRODUCTS)}",
+            "materials": ["plastic"],
+            "transport": rng.choice(TRANSPORTS),
+            "packaging": "box",
+            "score": score,
+            "rating": rating_for(score),
+            "suggestions": [],
+            "suggestions_status": "none",
+            "issues": rng.sample(ISSUES, rng.randint(0, 3)),
+            "timestamp": f"2025-01-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+        })
+    return records
+
+
+def fill(store, records, chunk=50):
+    for start in range(0, len(records), chunk):
+        store.add_many([dict(record) for record in records[start:start + chunk]])
+    return store
+
+
+def write_v0_file(path, records):
+    conn = sqlite3.connect(path)
+    conn.executescript(V0_SCHEMA)
+    conn.executemany(
+        "INSERT INTO submissions (timestamp, product_name, score, rating, record) VALUES (?, ?, ?, ?, ?)",
+        [(r['timestamp'], r['product_name'], r['score'], r['rating'], json.dumps(r)) for r in records]
+    )
+    conn.commit()
+    conn.close()
+
+
+def product_keys():
+    return [product_key(f"Product {i}") for i in range(PRODUCTS)]
+
+
+@pytest.fixture
+def records():
+    return make_records(600)
+
+
+@pytest.fixture
+def stores(tmp_path, records):
+    """A memory store, then a SQLite store and a second handle on its file, all holding `records`."""
+    path = str(tmp_path / "store.db")
+    sqlite_store = fill(SqliteSubmissionStore(path), records)
+    return fill(MemorySubmissionStore(), records), sqlite_store, SqliteSubmissionStore(path)
+
+
+@pytest.fixture
+def migrated(tmp_path, records):
+    """A memory store holding `records`, and a SQLite store opened on a v0 file with the same rows."""
+    path = str(tmp_path / "old.db")
+    write_v0_file(path, records)
+    return fill(MemorySubmissionStore(), records), SqliteSubmissionStore(path)
+
+
+def test_version_chains_agree(stores):
+    reference, *others = stores
+    for store in others:
+        for key in product_keys():
+            assert store.versions(key) == reference.versions(key)
+            assert store.latest(key) == reference.latest(key)
+
+
+def test_summaries_agree(stores):
+    reference, *others = stores
+    for store in others:
+        for scope in ("all", "latest"):
+            assert store.summary(scope) == reference.summary(scope)
+
+
+def test_summary_quantiles_agree(stores, migrated):
+    reference, *others = stores
+    for store in [*others, migrated[1]]:
+        for scope in ("all", "latest"):
+            quantiles = store.summary(scope, [0, 0.1, 0.5, 0.99, 1])['quantiles']
+            assert quantiles == reference.summary(scope, [0, 0.1, 0.5, 0.99, 1])['quantiles']
+
+
+def test_issue_cooccurrence_agrees(stores, migrated):
+    reference, *others = stores
+    for store in [*others, migrated[1]]:
+        for scope in ("all", "latest"):
+            assert store.issue_pairs(scope) == reference.issue_pairs(scope)
+            for issue in ISSUES:
+                assert store.related_issues(issue, scope, 2) == reference.related_issues(issue, scope, 2)
+
+
+def test_issue_pairs_count_latest_versions(stores, records):
+    latest = {}
+    for record in records:
+        latest[record['product_name']] = record
+    for store in stores:
+        counts = {tuple(pair['issues']): pair['count'] for pair in store.issue_pairs("latest")}
+        assert counts
+        for pair, count in counts.items():
+            assert count == sum(1 for r in latest.values() if set(pair) <= set(r['issues']))
+        assert store.related_issues("No such issue", "latest") is None
+
+
+def test_latest_summary_counts_each_product_once(stores, records):
+    latest = {}
+    for record in records:
+        latest[record['product_name']] = record
+    for store in stores:
+        summary = store.summary("latest")
+        assert summary['total_products'] == len(latest)
+        assert summary['ratings'] == {r: sum(1 for x in latest.values() if x['rating'] == r) for r in "ABCDF"}
+        assert summary['distribution']['max_score'] == max(r['score'] for r in latest.values())
+
+
+def test_sqlite_summary_catches_up_on_rows_from_other_workers(tmp_path, records):
+    path = str(tmp_path / "store.db")
+    reader = SqliteSubmissionStore(path)
+    writer = SqliteSubmissionStore(path)
+    reference = MemorySubmissionStore()
+    for start in range(0, len(records), 100):
+        chunk = records[start:start + 100]
+        fill(writer, chunk)
+        fill(reference, chunk)
+        for scope in ("all", "latest"):
+            assert reader.summary(scope) == reference.summary(scope)
+
+
+def test_v0_file_is_migrated_in_place(migrated):
+    reference, store = migrated
+    assert store._conn().execute("PRAGMA user_version").fetchone()[0] == len(SqliteSubmissionStore.MIGRATIONS)
+    for key in product_keys():
+        assert store.versions(key) == reference.versions(key)
+    for scope in ("all", "latest"):
+        assert store.summary(scope) == reference.summary(scope)
+
+
+def test_new_rows_extend_migrated_version_chains(migrated, records):
+    reference, store = migrated
+    rescored = dict(records[0], score=99.0, rating="A", timestamp="2025-01-02T00:00:00")
+    for target in (reference, store):
+        target.add(dict(rescored))
+    key = product_key(rescored['product_name'])
+    assert store.versions(key) == reference.versions(key)
+    assert store.summary("latest") == reference.summary("latest")
+
+
+def expected_ranking(reference, k, descending, ratings, transport):
+    """Brute force over each product's latest version."""
+    latest = [record for record in map(reference.latest, product_keys()) if record is not None]
+    matching = [
+        record for record in latest
+        if (not ratings or record['rating'] in ratings)
+        and (transport is None or transport_key(record['transport']) == transport_key(transport))
+    ]
+    matching.sort(key=lambda record: (record['score'], record['id']), reverse=descending)
+    return [record['id'] for record in matching[:k]]
+
+
+def test_fixture_ratings_follow_rating_score_ranges(records):
+    for record in records:
+        low, high = RATING_SCORE_RANGES[record['rating']]
+        assert low <= record['score'] < high
+
+
+@pytest.mark.parametrize("ratings, transport", RANKING_FILTERS)
+@pytest.mark.parametrize("descending", [True, False], ids=["top", "bottom"])
+def test_rankings_agree(stores, descending, ratings, transport):
+    reference = stores[0]
+    for k in (1, 20, 1000):
+        expected = expected_ranking(reference, k, descending, ratings, transport)
+        for store in stores:
+            assert [r['id'] for r in store.ranked(k, descending, ratings, transport)] == expected
+
+
+@pytest.mark.parametrize("ratings, transport", RANKING_FILTERS)
+def test_migrated_rankings_agree(migrated, ratings, transport):
+    reference, store = migrated
+    for descending in (True, False):
+        expected = expected_ranking(reference, 20, descending, ratings, transport)
+        assert [r['id'] for r in store.ranked(20, descending, ratings, transport)] == expected
+
+
+@pytest.mark.parametrize("granularity", ["minute", "hour", "day"])
+def test_timeseries_agree(stores, migrated, granularity):
+    reference, *others = stores
+    for store in [*others, migrated[1]]:
+        assert store.timeseries(granularity) == reference.timeseries(granularity)
+        window = ("2025-01-01T00:03:00", "2025-01-01T00:07:00")
+        assert store.timeseries(granularity, *window, limit=3) == reference.timeseries(granularity, *window, limit=3)
+
+
+def test_migrations_are_applied_once(tmp_path, records):
+    path = str(tmp_path / "old.db")
+    write_v0_file(path, records)
+    first = SqliteSubmissionStore(path).summary("latest")
+    assert SqliteSubmissionStore(path).summary("latest") == first
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda tmp_path: MemorySubmissionStore(),
+    lambda tmp_path: SqliteSubmissionStore(str(tmp_path / "store.db")),
+], ids=["memory", "sqlite"])
+def test_clear_does_not_reuse_ids(tmp_path, make_store, records):
+    store = fill(make_store(tmp_path), records[:10])
+    store.clear()
+    assert store.summary()['total_products'] == 0
+    assert store.add(dict(records[0]))['id'] == 11
@@ -0,0 +1,139 @@
+"""Named weight profiles: validated once, then referenced by id."""
+import hashlib
+import math
+import re
+import threading
+from collections import namedtuple
+
+DEFAULT_PROFILE_ID = "default"
+INLINE_PREFIX = "inline-"
+PROFILE_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+WEIGHT_FIELDS = ('gwp', 'circularity', 'cost')
+
+
+class WeightProfile(namedtuple('WeightProfile', ['id', 'name', 'gwp', 'circularity', 'cost'])):
+    """An immutable, already validated set of weights."""
+
+    __slots__ = ()
+
+    @property
+    def weights(self):
+        return {"gwp": self.gwp, "circularity": self.circularity, "cost": self.cost}
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "weights": self.weights}
+
+
+class ProfileConflict(ValueError):
+    """A profile id is already registered with different weights."""
+
+
+def make_profile(weights, profile_id=None, name=None):
+    """Validate a weights dict into a WeightProfile; raises ValueError."""
+    if isinstance(weights, WeightProfile):
+        return weights
+    try:
+        values = [float(weights[field]) for field in WEIGHT_FIELDS]
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Weights must have numeric 'gwp', 'circularity' and 'cost'")
+    if not all(math.isfinite(value) for value in values):
+        raise ValueError("Weights must be finite numbers")
+    # Keeps scores within 0-100, where the summary histogram is exact.
+    if not all(0 <= value <= 1 for value in values):
+        raise ValueError("Each weight must be between 0 and 1")
+    if abs(sum(values) - 1.0) > 0.01:
+        raise ValueError("Weights must sum to 1.0")
+    return WeightProfile(profile_id, name, *values)
+
+
+def content_id(profile):
+    """Stable id for inline weights, the same in every worker."""
+    encoded = ','.join(f"{value:.6f}" for value in (profile.gwp, profile.circularity, profile.cost))
+    return INLINE_PREFIX + hashlib.sha256(encoded.encode('ascii')).hexdigest()[:16]
+
+
+class WeightRegistry:
+    """
+    Lookup of weight profiles by id.
+
+    Named profiles are registered once (and never change); inline weights
+    sent with a request are interned under a content hash, so identical
+    weights share one profile. Profiles are persisted through the submission
+    store so that ids stored on records resolve in every worker.
+    """
+
+    def __init__(self, default_weights, store=None):
+        self.store = store
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self.default = make_profile(default_weights, DEFAULT_PROFILE_ID, "Default")
+        self._profiles[DEFAULT_PROFILE_ID] = self.default
+
+    def _remember(self, profile):
+        """Persist a profile unless one with its id exists; returns the stored one."""
+        if self.store is not None:
+            profile = self.store.save_weight_profile(profile)
+        with self._lock:
+            return self._profiles.setdefault(profile.id, profile)
+
+    def get(self, profile_id):
+        with self._lock:
+            profile = self._profiles.get(profile_id)
+        if profile is None and self.store is not None:
+            profile = self.store.get_weight_profile(profile_id)
+            if profile is not None:
+                with self._lock:
+                    profile = self._profiles.setdefault(profile_id, profile)
+        return profile
+
+    def register(self, profile_id, weights, name=None):
+        """
+        Add a named profile; returns (profile, created).
+
+        Registering an existing id again with the same weights is a no-op;
+        different weights raise ProfileConflict.
+        """
+        if not PROFILE_ID_PATTERN.match(profile_id or '') or profile_id.startswith(INLINE_PREFIX):
+            raise ValueError(
+                "Profile id must be 1-64 lowercase letters, digits, '-' or '_' and not start with 'inline-'"
+            )
+        profile = make_profile(weights, profile_id, name or profile_id)
+        existing = self.get(profile_id)
+        if existing is None:
+            existing = self._remember(profile)
+            if existing == profile:
+                return profile, True
+        if existing.weights != profile.weights:
+            raise ProfileConflict(f"Weight profile '{profile_id}' already exists with different weights")
+        return existing, False
+
+    def resolve(self, weights=None, profile_id=None):
+        """The profile a request asked for: by id, by inline weights, or the default."""
+        if profile_id is not None:
+            if weights is not None:
+                raise ValueError("Send either weights or weights_profile, not both")
+            profile = self.get(profile_id)
+            if profile is None:
+                raise ValueError(f"Unknown weight profile: {profile_id}")
+            return profile
+        if weights is None:
+            return self.default
+
+        profile = make_profile(weights)
+        profile_id = content_id(profile)
+        interned = self.get(profile_id)
+        if interned is None:
+            interned = self._remember(profile._replace(id=profile_id))
+        return interned
+
+    def profiles(self):
+        """Named profiles (inline ones are omitted), sorted by id."""
+        if self.store is not None:
+            for profile in self.store.weight_profiles():
+                with self._lock:
+                    self._profiles.setdefault(profile.id, profile)
+        with self._lock:
+            return sorted(
+                (p for p in self._profiles.values() if not p.id.startswith(INLINE_PREFIX)),
+                key=lambda p: p.id
+            )